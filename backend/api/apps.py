@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        import api.signals  # noqa: F401
+        from api.metrics import install_serializer_timer
+        from foodgram.settings import METRICS_ENABLED
+        if METRICS_ENABLED:
+            install_serializer_timer()
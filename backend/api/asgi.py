@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections
+
+from foodgram.settings import ASGI_THREADS
+
+
+class ThreadPoolASGIHandler(ASGIHandler):
+    """ASGI: соединения в цикле событий, запросы в пуле потоков.
+
+    В Django 3.2 нет асинхронного ORM, а DRF 3.13 не поддерживает
+    async-представления. Стандартный ASGIHandler вызывает каждую
+    синхронную middleware и представление через
+    sync_to_async(thread_sensitive=True), то есть в одном общем потоке на
+    процесс. Здесь цепочка middleware и представление выполняются
+    целиком за один переход в пул из ASGI_THREADS потоков, а цикл событий
+    держит медленных клиентов и keep-alive соединения.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.executor = ThreadPoolExecutor(
+            ASGI_THREADS, thread_name_prefix='asgi'
+        )
+
+    def load_middleware(self, is_async=False):
+        super().load_middleware(is_async=False)
+
+    async def get_response_async(self, request):
+        return await sync_to_async(
+            self.get_response_in_thread,
+            thread_sensitive=False,
+            executor=self.executor,
+        )(request)
+
+    def get_response_in_thread(self, request):
+        # Соединения потока пула закрываются по CONN_MAX_AGE, как
+        # сигналами request_started и request_finished в WSGI.
+        close_old_connections()
+        try:
+            return self.get_response(request)
+        finally:
+            close_old_connections()
+
+    async def send_response(self, response, send):
+        if response.streaming:
+            await self.send_streaming(response, send)
+        else:
+            await super().send_response(response, send)
+
+    async def send_streaming(self, response, send):
+        """Потоковый ответ без блокировки цикла событий.
+
+        Django 3.2 перебирает тело прямо в цикле событий, а генератор
+        файла списка покупок читает базу. Каждая часть готовится в общем
+        потоке sync_to_async(thread_sensitive=True): курсор остаётся в
+        одном потоке, а медленный клиент не занимает поток между частями.
+        """
+        headers = [
+            (
+                header.encode('ascii') if isinstance(header, str)
+                else bytes(header),
+                value.encode('latin1') if isinstance(value, str)
+                else bytes(value),
+            )
+            for header, value in response.items()
+        ]
+        headers += [
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+            for cookie in response.cookies.values()
+        ]
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': headers,
+        })
+        next_part = sync_to_async(
+            partial(next, iter(response), None), thread_sensitive=True
+        )
+        part = await next_part()
+        while part is not None:
+            for chunk, _ in self.chunk_bytes(part):
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+            part = await next_part()
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
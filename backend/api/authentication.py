@@ -0,0 +1,74 @@
+from hashlib import sha256
+
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from foodgram.settings import AUTH_TOKEN_CACHE_TIMEOUT
+
+
+def get_token_cache_key(key):
+    # В ключ кэша попадает хэш, а не сам токен.
+    return f'auth:token:{sha256(key.encode()).hexdigest()}'
+
+
+def get_user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def invalidate_user(user_id, token_keys=None):
+    """Сбрасывает снимки пользователя: по его токенам и по id."""
+    if token_keys is None:
+        token_keys = Token.objects.filter(
+            user_id=user_id
+        ).values_list('key', flat=True)
+    cache.delete_many([
+        get_user_cache_key(user_id),
+        *(get_token_cache_key(key) for key in token_keys),
+    ])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication со снимком пользователя в общем кэше.
+
+    Запрос к authtoken_token и users_user выполняется только при промахе
+    кэша. Снимок сбрасывается сигналами api.signals при удалении токена
+    (выход), сохранении пользователя (смена пароля, деактивация, правка
+    профиля) и его удалении, в остальных случаях живёт
+    AUTH_TOKEN_CACHE_TIMEOUT секунд. С кэшем в памяти процесса
+    (LocMemCache) сброс не дошёл бы до других воркеров, и вместо этого
+    класса используется обычный TokenAuthentication
+    (AUTH_TOKEN_CACHE_ENABLED).
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = get_token_cache_key(key)
+        user = cache.get(cache_key)
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(cache_key, user, AUTH_TOKEN_CACHE_TIMEOUT)
+            return user, token
+        if not user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        return user, Token(key=key, user=user)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT с пользователем из того же кэша снимков, по id.
+
+    Подпись проверяется без базы. Выданный access-токен нельзя отозвать
+    выходом, поэтому срок его жизни короткий (SIMPLE_JWT).
+    """
+
+    def get_user(self, validated_token):
+        cache_key = get_user_cache_key(validated_token.get('user_id'))
+        user = cache.get(cache_key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(cache_key, user, AUTH_TOKEN_CACHE_TIMEOUT)
+        elif not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'))
+        return user
@@ -0,0 +1,78 @@
+from io import BytesIO
+from random import Random
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from recipes.models import Ingredient, Recipe
+
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+IMAGE_NAME = 'static/recipe/benchmark.png'
+RECIPE_TEXT = 'Рецепт для нагрузочного тестирования.'
+
+
+def get_image():
+    """Изображение-заглушка синтетических рецептов (seed_benchmark, bench_*).
+
+    Файл создаётся в хранилище один раз, ответы API и обработка
+    изображений работают с настоящим файлом.
+    """
+    if default_storage.exists(IMAGE_NAME):
+        return IMAGE_NAME
+    buffer = BytesIO()
+    Image.new('RGB', (640, 480), '#E26C2D').save(buffer, 'PNG')
+    return default_storage.save(IMAGE_NAME, ContentFile(buffer.getvalue()))
+
+
+def create_author(username):
+    return User.objects.create(
+        username=username,
+        email=f'{username}@example.com',
+    )
+
+
+def create_ingredients(name, count):
+    """Создаёт ингредиенты "<name> <n>", возвращает id по порядку."""
+    Ingredient.objects.bulk_create(
+        (
+            Ingredient(name=f'{name} {number:06d}', measurement_unit='г')
+            for number in range(count)
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    # bulk_create в Django 3.2 заполняет pk только на PostgreSQL.
+    return list(Ingredient.objects.filter(
+        name__startswith=f'{name} '
+    ).order_by('id').values_list('id', flat=True))
+
+
+def create_recipes(author_ids, count, name='Рецепт', random=None):
+    """Создаёт рецепты "<name> <n>" случайных авторов из author_ids.
+
+    Возвращает id всех рецептов этих авторов по порядку, поэтому
+    авторы должны быть новыми.
+    """
+    random = random or Random(0)
+    image = get_image()
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                name=f'{name} {number}',
+                author_id=random.choice(author_ids),
+                text=RECIPE_TEXT,
+                cooking_time=random.randint(1, 180),
+                image=image,
+            )
+            for number in range(count)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return list(Recipe.objects.filter(
+        author_id__in=author_ids
+    ).order_by('id').values_list('id', flat=True))
@@ -0,0 +1,87 @@
+from hashlib import md5
+from time import time
+
+from django.core.cache import cache
+from django.http.response import HttpResponse
+from django.utils.cache import get_conditional_response
+
+from api.middleware import compress, compress_response
+from foodgram.settings import COMPRESSION_ENABLED, REFERENCE_CACHE_TIMEOUT
+
+
+def get_version_key(model):
+    return f'api:version:{model._meta.label_lower}'
+
+
+def get_table_version(model):
+    key = get_version_key(model)
+    version = cache.get(key)
+    if version is None:
+        # Счётчик начинается с текущего времени, чтобы после вытеснения
+        # ключа из кэша не вернуться к версии, под которой ещё лежат
+        # устаревшие ответы.
+        cache.add(key, int(time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_table_version(model):
+    key = get_version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time() * 1000), timeout=None)
+
+
+class VersionedCacheMixin:
+    """Отдаёт list из кэша готовыми JSON-байтами с ETag.
+
+    Ключ включает версию таблицы модели, которую сигналы увеличивают
+    при каждом изменении, поэтому явная инвалидация не нужна. Сжатые
+    варианты тела хранятся рядом, под ключом с кодировкой, и
+    CompressionMiddleware их уже не сжимает.
+    """
+
+    def get_cache_key(self, request):
+        model = self.get_queryset().model
+        # Хэш, а не сама строка запроса: длина ключа memcached ограничена
+        # 250 байтами.
+        query = md5(request.GET.urlencode().encode()).hexdigest()
+        return (
+            f'api:list:{model._meta.label_lower}:'
+            f'{get_table_version(model)}:{query}'
+        )
+
+    def list(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        if renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+        key = self.get_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            response = super().list(request, *args, **kwargs)
+            body = renderer.render(
+                response.data,
+                request.accepted_media_type,
+                self.get_renderer_context()
+            )
+            cached = (f'"{md5(body).hexdigest()}"', body)
+            cache.set(key, cached, REFERENCE_CACHE_TIMEOUT)
+        etag, body = cached
+        response = HttpResponse(body, content_type=renderer.media_type)
+        response['ETag'] = etag
+
+        def compress_cached(content, encoding):
+            variant_key = f'{key}:{encoding}'
+            compressed = cache.get(variant_key)
+            if compressed is None:
+                compressed = compress(content, encoding)
+                cache.set(variant_key, compressed, REFERENCE_CACHE_TIMEOUT)
+            return compressed
+
+        if COMPRESSION_ENABLED:
+            response = compress_response(request, response, compress_cached)
+        # 304 с тем же ETag, что и у полного ответа, в том числе W/"...".
+        return get_conditional_response(
+            request, etag=response['ETag'], response=response
+        ) or response
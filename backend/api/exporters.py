@@ -0,0 +1,169 @@
+import csv
+import logging
+import os
+from abc import ABC, abstractmethod
+from tempfile import SpooledTemporaryFile
+
+from django.core.exceptions import ImproperlyConfigured
+from django.http.response import StreamingHttpResponse
+
+from foodgram.settings import (
+    SHOPPING_CART_FILENAME,
+    SHOPPING_CART_CHUNK_SIZE,
+    SHOPPING_CART_PDF_FONT,
+)
+
+
+logger = logging.getLogger(__name__)
+
+SHOPPING_CART_TITLE = 'Список покупок:'
+
+
+class Echo:
+    """Псевдо-буфер: csv.writer отдаёт строку, а не копит её в памяти."""
+
+    def write(self, value):
+        return value
+
+
+class ShoppingCartRenderer(ABC):
+    """Базовый рендерер списка покупок.
+
+    render() принимает итератор агрегированных строк ингредиентов
+    и отдаёт файл по частям, не собирая его целиком.
+    """
+    extension = None
+    content_type = None
+
+    def is_available(self):
+        return True
+
+    @abstractmethod
+    def render(self, ingredients):
+        """Итератор частей файла."""
+
+
+class TextShoppingCartRenderer(ShoppingCartRenderer):
+    extension = 'txt'
+    content_type = 'text/plain; charset=utf-8'
+
+    def render(self, ingredients):
+        yield SHOPPING_CART_TITLE
+        for ingredient in ingredients:
+            yield (
+                f"\n * {ingredient['ingredient__name']} "
+                f"- {ingredient['amount']}"
+                f", {ingredient['ingredient__measurement_unit']}"
+            )
+
+
+class CsvShoppingCartRenderer(ShoppingCartRenderer):
+    extension = 'csv'
+    content_type = 'text/csv; charset=utf-8'
+
+    def render(self, ingredients):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('Ингредиент', 'Количество', 'Единица'))
+        for ingredient in ingredients:
+            yield writer.writerow((
+                ingredient['ingredient__name'],
+                ingredient['amount'],
+                ingredient['ingredient__measurement_unit'],
+            ))
+
+
+class PdfShoppingCartRenderer(ShoppingCartRenderer):
+    """PDF через reportlab.
+
+    Встроенные шрифты PDF без кириллицы, поэтому без файла
+    SHOPPING_CART_PDF_FONT формат отключён.
+
+    Формат PDF требует таблицу ссылок в конце файла, поэтому документ
+    пишется во временный файл (в памяти только до SHOPPING_CART_CHUNK_SIZE)
+    и уже оттуда отдаётся частями.
+    """
+    extension = 'pdf'
+    content_type = 'application/pdf'
+    font_name = 'ShoppingCartFont'
+    font_size = 12
+    margin = 50
+
+    def is_available(self):
+        return os.path.exists(SHOPPING_CART_PDF_FONT)
+
+    def get_font(self):
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+
+        if not self.is_available():
+            raise ImproperlyConfigured(
+                f'Нет шрифта SHOPPING_CART_PDF_FONT: {SHOPPING_CART_PDF_FONT}'
+            )
+        if self.font_name not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(
+                TTFont(self.font_name, SHOPPING_CART_PDF_FONT)
+            )
+        return self.font_name
+
+    def render(self, ingredients):
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+
+        font = self.get_font()
+        _, height = A4
+        line_height = self.font_size * 1.5
+        with SpooledTemporaryFile(max_size=SHOPPING_CART_CHUNK_SIZE) as file:
+            pdf = canvas.Canvas(file, pagesize=A4)
+            pdf.setFont(font, self.font_size)
+            position = height - self.margin
+            pdf.drawString(self.margin, position, SHOPPING_CART_TITLE)
+            for ingredient in ingredients:
+                position -= line_height
+                if position < self.margin:
+                    pdf.showPage()
+                    pdf.setFont(font, self.font_size)
+                    position = height - self.margin
+                pdf.drawString(
+                    self.margin,
+                    position,
+                    f"• {ingredient['ingredient__name']} "
+                    f"- {ingredient['amount']}"
+                    f", {ingredient['ingredient__measurement_unit']}"
+                )
+            pdf.save()
+            file.seek(0)
+            yield from iter(
+                lambda: file.read(SHOPPING_CART_CHUNK_SIZE), b''
+            )
+
+
+def get_renderers():
+    renderers = {}
+    for renderer in (
+        TextShoppingCartRenderer(),
+        CsvShoppingCartRenderer(),
+        PdfShoppingCartRenderer(),
+    ):
+        if renderer.is_available():
+            renderers[renderer.extension] = renderer
+        else:
+            logger.warning(
+                'Формат списка покупок %s отключён: нет шрифта %s',
+                renderer.extension,
+                SHOPPING_CART_PDF_FONT,
+            )
+    return renderers
+
+
+SHOPPING_CART_RENDERERS = get_renderers()
+
+
+def stream_shopping_cart(ingredients, renderer):
+    response = StreamingHttpResponse(
+        renderer.render(ingredients),
+        content_type=renderer.content_type
+    )
+    filename = os.path.splitext(SHOPPING_CART_FILENAME)[0]
+    response['Content-Disposition'] = (f'attachment; filename'
+                                       f'="{filename}.{renderer.extension}"')
+    return response
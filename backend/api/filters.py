@@ -1,5 +1,17 @@
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
 from django_filters.rest_framework import FilterSet, filters
+
+from api.search import ingredient_index, recipe_index
+from foodgram.settings import (
+    INGREDIENT_SEARCH_BACKEND,
+    INGREDIENT_SEARCH_MAX_LIMIT,
+    RECIPE_SEARCH_CONFIG,
+)
 from recipes.models import (
     Tag,
     Ingredient,
@@ -11,12 +23,53 @@ User = get_user_model()
 
 
 class IngredientFilter(FilterSet):
-    name = filters.CharFilter(lookup_expr='startswith')
+    name = filters.CharFilter(method='filter_name')
+    limit = filters.NumberFilter(method='filter_limit', min_value=1)
 
     class Meta:
         model = Ingredient
         fields = ['name']
 
+    def get_limit(self):
+        limit = self.form.cleaned_data.get('limit')
+        if limit is None:
+            return None
+        return min(int(limit), INGREDIENT_SEARCH_MAX_LIMIT)
+
+    def filter_name(self, queryset, name, value):
+        """Сначала совпадения по началу названия, затем по вхождению.
+
+        PostgreSQL - два запроса по индексам миграции recipes 0010:
+        UPPER(name) text_pattern_ops для начала названия и триграммы для
+        вхождения. Остальные базы - индекс в памяти процесса, LIKE в
+        SQLite не учитывает регистр только у латиницы.
+        """
+        limit = self.get_limit()
+        if (INGREDIENT_SEARCH_BACKEND == 'memory'
+                or connections[queryset.db].vendor != 'postgresql'):
+            ids = ingredient_index.search(value, limit)
+        else:
+            prefix = queryset.filter(name__istartswith=value)
+            ids = list(
+                prefix.order_by('name').values_list('id', flat=True)[:limit]
+            )
+            if limit is None or len(ids) < limit:
+                ids += queryset.filter(name__icontains=value).exclude(
+                    name__istartswith=value
+                ).order_by('name').values_list('id', flat=True)[
+                    :None if limit is None else limit - len(ids)
+                ]
+        if not ids:
+            return queryset.none()
+        return queryset.filter(id__in=ids).order_by(Case(
+            *(When(id=pk, then=position)
+              for position, pk in enumerate(ids)),
+            output_field=IntegerField(),
+        ))
+
+    def filter_limit(self, queryset, name, value):
+        return queryset[:self.get_limit()]
+
 
 class RecipeFilter(FilterSet):
     tags = filters.ModelMultipleChoiceFilter(
@@ -30,6 +83,14 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
+    ordering = filters.ChoiceFilter(
+        choices=(
+            ('popular', 'Популярные'),
+            ('trending', 'Популярные за последнее время'),
+        ),
+        method='filter_ordering',
+    )
 
     class Meta:
         model = Recipe
@@ -46,3 +107,49 @@ class RecipeFilter(FilterSet):
         if value:
             return queryset.filter(shopping_cart__user=user)
         return queryset
+
+    def filter_search(self, queryset, name, value):
+        """Поиск по названию, описанию и ингредиентам с ранжированием.
+
+        PostgreSQL - tsvector с GIN-индексом, остальные базы - индекс
+        в памяти процесса (api.search.RecipeIndex). Из индекса берутся
+        все найденные рецепты, чтобы count и страницы были верными;
+        их id передаются параметрами запроса, поэтому для SQLite число
+        совпадений ограничено половиной SQLITE_MAX_VARIABLE_NUMBER
+        (32766 с SQLite 3.32).
+        """
+        if connections[queryset.db].vendor == 'postgresql':
+            query = SearchQuery(
+                value,
+                config=RECIPE_SEARCH_CONFIG,
+                search_type='websearch',
+            )
+            queryset = queryset.filter(search_vector=query).annotate(
+                search_rank=SearchRank(F('search_vector'), query)
+            )
+        else:
+            ranked = recipe_index.search(value)
+            if not ranked:
+                return queryset.none()
+            # Один WHEN на вес, а не на рецепт: веса повторяются.
+            groups = defaultdict(list)
+            for pk, rank in ranked:
+                groups[rank].append(pk)
+            queryset = queryset.filter(
+                id__in=[pk for pk, _ in ranked]
+            ).annotate(search_rank=Case(
+                *(When(id__in=ids, then=Value(rank))
+                  for rank, ids in groups.items()),
+                output_field=FloatField(),
+            ))
+        return queryset.order_by('-search_rank', '-pub_date')
+
+    def filter_ordering(self, queryset, name, value):
+        """Сортировка по рейтингу recipes.RecipeRanking.
+
+        Рейтинг пересчитывается командой refresh_rankings, при чтении
+        это соединение по первичному ключу и индекс по оценке.
+        """
+        return queryset.filter(ranking__isnull=False).annotate(
+            ranking_score=F(f'ranking__{value}_score')
+        ).order_by('-ranking_score', '-pub_date')
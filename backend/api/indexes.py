@@ -0,0 +1,85 @@
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from api.cache import get_table_version
+from foodgram.settings import SEARCH_INDEX_REFRESH
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix='search-index'
+                )
+    return _executor
+
+
+class VersionedIndex(ABC):
+    """Индекс в памяти процесса, согласованный с версиями таблиц models.
+
+    Версии хранятся в общем кэше (см. api.cache), поэтому индекс
+    согласован между процессами. Первый раз индекс строится в запросе,
+    а при смене версии перестраивается в фоновом потоке: до готовности
+    нового индекса запросы обслуживает прежний. lock занят, пока идёт
+    построение, и освобождается потоком, который его закончил.
+    """
+    models = ()
+    empty = ()
+
+    def __init__(self):
+        self.version = None
+        self.entries = self.empty
+        self.lock = Lock()
+
+    @abstractmethod
+    def build(self):
+        """Новое значение entries по текущим данным базы."""
+
+    def rebuild(self, version):
+        self.entries = self.build()
+        self.version = version
+
+    def refresh(self, wait=False):
+        """Перестраивает индекс, если версии таблиц изменились.
+
+        wait=True или SEARCH_INDEX_REFRESH='sync' - построение в текущем
+        потоке. Так же и внутри транзакции: её данные фоновому потоку
+        не видны.
+        """
+        version = tuple(get_table_version(model) for model in self.models)
+        if version == self.version:
+            return
+        if (wait or self.version is None or SEARCH_INDEX_REFRESH == 'sync'
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            with self.lock:
+                if version != self.version:
+                    self.rebuild(version)
+            return
+        if not self.lock.acquire(blocking=False):
+            return
+        try:
+            get_executor().submit(self.rebuild_in_background, version)
+        except Exception:
+            self.lock.release()
+            raise
+
+    def rebuild_in_background(self, version):
+        try:
+            self.rebuild(version)
+        except Exception:
+            logger.exception('Не удалось перестроить %s', type(self).__name__)
+        finally:
+            connections.close_all()
+            self.lock.release()
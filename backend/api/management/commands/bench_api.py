@@ -0,0 +1,387 @@
+import json
+import platform
+import re
+import subprocess
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from io import BytesIO
+from math import ceil
+from random import Random
+from statistics import mean
+from time import perf_counter
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, IngredientsList, Recipe, Tag
+
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(values, rank):
+    """Процентиль методом ближайшего ранга по отсортированному списку."""
+    return values[max(0, ceil(rank / 100 * len(values)) - 1)]
+
+
+class ClientTransport:
+    """Django test client в этом процессе, запросы SQL считаются точно."""
+
+    def __init__(self):
+        self.client = Client(HTTP_HOST='localhost')
+
+    def request(self, method, path, token=None, body=None):
+        headers = {}
+        if token:
+            headers['HTTP_AUTHORIZATION'] = f'Token {token}'
+        with CaptureQueriesContext(connection) as context:
+            start = perf_counter()
+            response = self.client.generic(
+                method,
+                path,
+                json.dumps(body) if body is not None else '',
+                content_type='application/json',
+                **headers
+            )
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = perf_counter() - start
+        return (
+            response.status_code,
+            elapsed,
+            len(context.captured_queries),
+            response.content if not response.streaming else b'',
+        )
+
+
+class HttpTransport:
+    """HTTP к запущенному серверу (gunicorn, runserver).
+
+    Число запросов SQL берётся из заголовка Server-Timing и известно,
+    только если сервер запущен с METRICS_SAMPLE_RATE=1.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, token=None, body=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Token {token}'
+        request = Request(
+            self.base_url + path,
+            data=json.dumps(body).encode() if body is not None else None,
+            headers=headers,
+            method=method,
+        )
+        start = perf_counter()
+        try:
+            with urlopen(request) as response:
+                content = response.read()
+                status, timing = response.status, response.headers.get(
+                    'Server-Timing', ''
+                )
+        except HTTPError as error:
+            content = error.read()
+            status, timing = error.code, error.headers.get(
+                'Server-Timing', ''
+            )
+        elapsed = perf_counter() - start
+        match = SERVER_TIMING_QUERIES.search(timing)
+        return (
+            status,
+            elapsed,
+            int(match.group(1)) if match else None,
+            content,
+        )
+
+
+class Scenarios:
+    """Сценарии: каждый возвращает (метод, путь, токен, тело запроса)."""
+
+    def __init__(self, prefix, random):
+        self.random = random
+        self.tokens = dict(Token.objects.filter(
+            user__username__startswith=prefix
+        ).values_list('user_id', 'key'))
+        if not self.tokens:
+            raise CommandError(
+                f'Нет пользователей с префиксом "{prefix}", '
+                'сначала выполните seed_benchmark.'
+            )
+        self.users = list(self.tokens)
+        self.recipes = list(Recipe.objects.filter(
+            author_id__in=self.users[:1000]
+        ).values_list('id', 'author_id')[:5000])
+        self.tags = list(Tag.objects.values_list('id', 'slug'))
+        self.ingredients = list(
+            Ingredient.objects.values_list('id', 'name')[:5000]
+        )
+        self.created = []
+        self.updated = {}
+        buffer = BytesIO()
+        Image.new('RGB', (64, 64), 'orange').save(buffer, 'PNG')
+        self.image = 'data:image/png;base64,' + b64encode(
+            buffer.getvalue()
+        ).decode()
+
+    def token(self):
+        return self.tokens[self.random.choice(self.users)]
+
+    def feed(self):
+        page = self.random.randint(1, 20)
+        return 'GET', f'/api/recipes/?page={page}', None, None
+
+    def feed_popular(self):
+        ordering = self.random.choice(('popular', 'trending'))
+        return 'GET', f'/api/recipes/?ordering={ordering}', None, None
+
+    def feed_filtered(self):
+        _, slug = self.random.choice(self.tags)
+        return ('GET', f'/api/recipes/?tags={slug}&is_favorited=1',
+                self.token(), None)
+
+    def detail(self):
+        recipe_id, _ = self.random.choice(self.recipes)
+        return 'GET', f'/api/recipes/{recipe_id}/', self.token(), None
+
+    def tag_list(self):
+        return 'GET', '/api/tags/', None, None
+
+    def subscriptions(self):
+        return ('GET', '/api/users/subscriptions/?recipes_limit=3',
+                self.token(), None)
+
+    def download_cart(self):
+        return ('GET', '/api/recipes/download_shopping_cart/',
+                self.token(), None)
+
+    def typeahead(self):
+        _, name = self.random.choice(self.ingredients)
+        prefix = name[:self.random.randint(2, 4)]
+        return ('GET', f'/api/ingredients/?name={quote(prefix)}&limit=10',
+                None, None)
+
+    def recipe_body(self, name):
+        return {
+            'name': name,
+            'text': 'Рецепт для нагрузочного тестирования.',
+            'cooking_time': self.random.randint(1, 180),
+            'image': self.image,
+            'tags': [tag_id for tag_id, _ in self.random.sample(
+                self.tags, min(2, len(self.tags))
+            )],
+            'ingredients': [
+                {'id': ingredient_id, 'amount': self.random.randint(1, 500)}
+                for ingredient_id, _ in self.random.sample(
+                    self.ingredients, min(8, len(self.ingredients))
+                )
+            ],
+        }
+
+    def create(self):
+        name = f'bench_api {len(self.created)} {self.random.random()}'
+        self.created.append(name)
+        return 'POST', '/api/recipes/', self.token(), self.recipe_body(name)
+
+    def update(self):
+        recipe_id, author_id = self.random.choice(self.recipes)
+        if recipe_id not in self.updated:
+            self.updated[recipe_id] = self.snapshot(recipe_id)
+        body = self.recipe_body(f'bench_api update {recipe_id}')
+        del body['image'], body['name']
+        return ('PATCH', f'/api/recipes/{recipe_id}/',
+                self.tokens[author_id], body)
+
+    @staticmethod
+    def snapshot(recipe_id):
+        """Поля рецепта, которые меняет сценарий update, в виде тела PATCH."""
+        return {
+            'cooking_time': Recipe.objects.values_list(
+                'cooking_time', flat=True
+            ).get(id=recipe_id),
+            'tags': list(Recipe.tags.through.objects.filter(
+                recipe_id=recipe_id
+            ).values_list('tag_id', flat=True)),
+            'ingredients': [
+                {'id': ingredient_id, 'amount': amount}
+                for ingredient_id, amount in IngredientsList.objects.filter(
+                    recipe_id=recipe_id
+                ).order_by('id').values_list('ingredient_id', 'amount')
+            ],
+        }
+
+    def cleanup(self, transport):
+        """Удаляет рецепты create и возвращает исходные данные рецептам update.
+
+        Данные возвращаются тем же PATCH через API, поэтому списки покупок,
+        версии таблиц и ETag обновляются как при обычной правке. Возвращает
+        id рецептов, которые вернуть не удалось.
+        """
+        recipes = Recipe.objects.filter(name__in=self.created)
+        for image, variants in recipes.values_list(
+            'image', 'image_variants'
+        ):
+            for path in {image, *variants.values()}:
+                default_storage.delete(path)
+        recipes.delete()
+        authors = dict(self.recipes)
+        failed = []
+        for recipe_id, body in self.updated.items():
+            status, *_ = transport.request(
+                'PATCH',
+                f'/api/recipes/{recipe_id}/',
+                self.tokens[authors[recipe_id]],
+                body,
+            )
+            if status != 200:
+                failed.append(recipe_id)
+        return failed
+
+
+SCENARIOS = (
+    'feed', 'feed_popular', 'feed_filtered', 'detail', 'tag_list',
+    'subscriptions', 'download_cart', 'typeahead', 'create', 'update',
+)
+
+
+class Command(BaseCommand):
+    help = ('Run API scenarios and report p50/p95/p99 latency, SQL queries '
+            'per request and throughput. Data comes from seed_benchmark.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench_')
+        parser.add_argument('--url', help='Base URL of a running server, '
+                            'the in-process test client by default.')
+        parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS,
+                            default=SCENARIOS)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Write results as JSON.')
+        parser.add_argument('--compare', help='JSON results to compare to.')
+
+    @staticmethod
+    def get_commit():
+        try:
+            return subprocess.run(
+                ('git', 'rev-parse', '--short', 'HEAD'),
+                capture_output=True, check=True, text=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def run_scenario(self, transport, scenario, options):
+        # Запросы готовятся заранее, чтобы случайные данные не зависели
+        # от порядка завершения потоков.
+        requests = [
+            scenario() for _ in range(options['warmup'] + options['requests'])
+        ]
+        for request in requests[:options['warmup']]:
+            transport.request(*request)
+        start = perf_counter()
+        if options['concurrency'] > 1:
+            with ThreadPoolExecutor(options['concurrency']) as executor:
+                results = list(executor.map(
+                    lambda request: transport.request(*request),
+                    requests[options['warmup']:]
+                ))
+        else:
+            results = [
+                transport.request(*request)
+                for request in requests[options['warmup']:]
+            ]
+        wall = perf_counter() - start
+        errors = [
+            (status, content[:200]) for status, _, _, content in results
+            if status >= 400
+        ]
+        if errors:
+            self.stderr.write(f'{scenario.__name__}: {errors[0]}')
+        latencies = sorted(elapsed for _, elapsed, _, _ in results)
+        queries = [count for _, _, count, _ in results if count is not None]
+        return {
+            'requests': len(results),
+            'errors': len(errors),
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'mean_ms': mean(latencies) * 1000,
+            'queries_mean': mean(queries) if queries else None,
+            'queries_max': max(queries) if queries else None,
+            'throughput_rps': len(results) / wall,
+        }
+
+    def report(self, results, previous):
+        self.stdout.write(
+            f'{"scenario":<15}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"queries":>9}{"rps":>9}{"errors":>8}'
+        )
+        for name, result in results.items():
+            queries = result['queries_mean']
+            line = (
+                f'{name:<15}{result["p50_ms"]:>9.1f}{result["p95_ms"]:>9.1f}'
+                f'{result["p99_ms"]:>9.1f}'
+                f'{"-" if queries is None else f"{queries:.1f}":>9}'
+                f'{result["throughput_rps"]:>9.1f}{result["errors"]:>8}'
+            )
+            before = previous.get(name)
+            if before:
+                line += '  p95 {:+.0%}'.format(
+                    result['p95_ms'] / before['p95_ms'] - 1
+                )
+            self.stdout.write(line)
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests больше 0.')
+        if options['concurrency'] > 1 and not options['url']:
+            raise CommandError('--concurrency работает только с --url.')
+        if options['url']:
+            transport = HttpTransport(options['url'])
+        else:
+            transport = ClientTransport()
+        previous = {}
+        if options['compare']:
+            with open(options['compare'], encoding='UTF-8') as file:
+                previous = json.load(file)['scenarios']
+        scenarios = Scenarios(options['prefix'], Random(options['seed']))
+        results = {}
+        try:
+            for name in options['scenarios']:
+                results[name] = self.run_scenario(
+                    transport, getattr(scenarios, name), options
+                )
+        finally:
+            failed = scenarios.cleanup(transport)
+            if failed:
+                self.stderr.write(
+                    f'Не удалось вернуть исходные данные рецептам: {failed}'
+                )
+        self.report(results, previous)
+        if options['output']:
+            with open(options['output'], 'w', encoding='UTF-8') as file:
+                json.dump({
+                    'commit': self.get_commit(),
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'target': options['url'] or 'test client',
+                    'database': connection.vendor,
+                    'python': platform.python_version(),
+                    'options': {
+                        key: options[key] for key in (
+                            'requests', 'warmup', 'concurrency', 'seed',
+                            'scenarios',
+                        )
+                    },
+                    'scenarios': results,
+                }, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+from statistics import mean
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.management.commands.bench_api import percentile
+
+MODES = {
+    'per-request': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False,
+                    'POOL_SIZE': 0},
+    'persistent': {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': False,
+                   'POOL_SIZE': 0},
+    'persistent+checks': {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True,
+                          'POOL_SIZE': 0},
+    'pool': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': True},
+}
+
+
+class Command(BaseCommand):
+    help = ('Measure the per-request cost of database connections: a new '
+            'connection per request, persistent connections with and '
+            'without health checks and the process pool.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--threads', type=int, default=1)
+        parser.add_argument('--pool-size', type=int, default=10)
+        parser.add_argument('--modes', nargs='+', choices=MODES,
+                            default=list(MODES))
+
+    @staticmethod
+    def request(alias, seen):
+        """Один запрос HTTP: сигналы начала и конца и запрос к базе."""
+        connection = connections[alias]
+        start = perf_counter()
+        connection.close_if_unusable_or_obsolete()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        seen.add(connection.connection)
+        connection.close_if_unusable_or_obsolete()
+        return perf_counter() - start
+
+    def run_mode(self, mode, options):
+        alias = f'bench_{mode}'
+        connections.settings[alias] = {
+            **connections['default'].settings_dict,
+            'POOL_SIZE': options['pool_size'],
+            **MODES[mode],
+        }
+        seen = set()
+
+        def work(count):
+            try:
+                return [self.request(alias, seen) for _ in range(count)]
+            finally:
+                connections[alias].close()
+
+        per_thread = max(1, options['requests'] // options['threads'])
+        start = perf_counter()
+        with ThreadPoolExecutor(options['threads']) as executor:
+            latencies = sorted(
+                latency
+                for result in executor.map(
+                    work, [per_thread] * options['threads']
+                )
+                for latency in result
+            )
+        wall = perf_counter() - start
+        pool = connections[alias].pool
+        if pool is not None:
+            for connection in pool.idle:
+                connection.close()
+        return {
+            'mean_ms': mean(latencies) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'rps': len(latencies) / wall,
+            'connections': len(seen),
+        }
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['threads'] < 1:
+            raise CommandError('--requests и --threads больше 0.')
+        if connections['default'].settings_dict['ENGINE'] != (
+            'foodgram.postgresql'
+        ):
+            raise CommandError('Нужна база PostgreSQL (foodgram.postgresql).')
+        self.stdout.write(
+            f'{"mode":<20}{"mean ms":>9}{"p95 ms":>9}{"rps":>9}'
+            f'{"connections":>13}'
+        )
+        for mode in options['modes']:
+            result = self.run_mode(mode, options)
+            self.stdout.write(
+                f'{mode:<20}{result["mean_ms"]:>9.2f}'
+                f'{result["p95_ms"]:>9.2f}{result["rps"]:>9.0f}'
+                f'{result["connections"]:>13}'
+            )
@@ -0,0 +1,116 @@
+import json
+import os
+import tracemalloc
+from base64 import b64encode
+from io import BytesIO
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Tag
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Compare peak memory of recipe creation with a Base64 JSON '
+            'image and a multipart/form-data upload. Test data is created '
+            'in a rolled back transaction.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=float, default=10)
+
+    @staticmethod
+    def make_image(size):
+        """PNG из шума: почти не сжимается, размер близок к заданному."""
+        side = int((size / 3) ** 0.5)
+        buffer = BytesIO()
+        Image.frombytes('RGB', (side, side), os.urandom(side * side * 3)).save(
+            buffer, 'PNG', compress_level=0
+        )
+        return buffer.getvalue()
+
+    def seed(self):
+        user = User.objects.create(
+            username='bench_image_upload',
+            email='bench_image_upload@example.com',
+        )
+        tag = Tag.objects.create(
+            name='bench_image_upload',
+            slug='bench_image_upload',
+        )
+        ingredient = Ingredient.objects.create(
+            name='bench_image_upload',
+            measurement_unit='г',
+        )
+        return Token.objects.create(user=user).key, tag, ingredient
+
+    @staticmethod
+    def measure(client, body, content_type, token):
+        tracemalloc.start()
+        start = perf_counter()
+        response = client.generic(
+            'POST',
+            '/api/recipes/',
+            body,
+            content_type=content_type,
+            HTTP_AUTHORIZATION=f'Token {token}',
+        )
+        elapsed = perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if response.status_code != 201:
+            raise CommandError(response.content)
+        return elapsed, peak
+
+    def handle(self, *args, **options):
+        image = self.make_image(int(options['size_mb'] * 1024 * 1024))
+        client = Client(HTTP_HOST='localhost')
+        with TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                with transaction.atomic():
+                    self.compare(client, image)
+
+    def compare(self, client, image):
+        token, tag, ingredient = self.seed()
+        fields = {
+            'text': 'benchmark',
+            'cooking_time': 1,
+            'tags': [tag.id],
+            'ingredients': [{'id': ingredient.id, 'amount': 1}],
+        }
+        base64_body = json.dumps(dict(
+            fields,
+            name='base64',
+            image='data:image/png;base64,' + b64encode(image).decode(),
+        ))
+        upload = BytesIO(image)
+        upload.name = 'benchmark.png'
+        multipart_body = encode_multipart(BOUNDARY, dict(
+            fields,
+            name='multipart',
+            tags=json.dumps(fields['tags']),
+            ingredients=json.dumps(fields['ingredients']),
+            image=upload,
+        ))
+        modes = (
+            ('base64', base64_body, 'application/json'),
+            ('multipart', multipart_body, MULTIPART_CONTENT),
+        )
+        self.stdout.write(f'image: {len(image) / 1024 / 1024:.1f} MiB')
+        for mode, body, content_type in modes:
+            elapsed, peak = self.measure(client, body, content_type, token)
+            self.stdout.write(
+                f'{mode:<10} body={len(body) / 1024 / 1024:6.1f} MiB  '
+                f'peak={peak / 1024 / 1024:6.1f} MiB  '
+                f'time={elapsed * 1000:7.1f} ms'
+            )
+        transaction.set_rollback(True)
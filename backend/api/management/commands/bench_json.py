@@ -0,0 +1,71 @@
+from timeit import repeat
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api import renderers
+from api.renderers import FastJSONRenderer
+from api.serializers.recipes_serializers import IngredientSerializer
+from api.views.recipes_views import RecipesViewSet
+from recipes.models import Ingredient
+
+
+class AsciiJSONRenderer(JSONRenderer):
+    """Стандартный json.dumps: кириллица экранируется \\uXXXX."""
+    ensure_ascii = True
+
+
+class Command(BaseCommand):
+    help = ('Compare JSON renderers on the full /api/ingredients/ list and '
+            'a recipe page: encode time and response size.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    @staticmethod
+    def get_payloads(page_size):
+        """Данные ответов до рендеринга, как их получает рендерер."""
+        response = RecipesViewSet.as_view({'get': 'list'})(
+            APIRequestFactory().get('/api/recipes/', {'limit': page_size})
+        )
+        return {
+            'ingredients': IngredientSerializer(
+                Ingredient.objects.all(), many=True
+            ).data,
+            f'recipes x{len(response.data["results"])}': response.data,
+        }
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat больше 0.')
+        candidates = {
+            'json ascii': AsciiJSONRenderer(),
+            'drf': JSONRenderer(),
+            'orjson' if renderers.orjson else 'fast (json)':
+                FastJSONRenderer(),
+        }
+        self.stdout.write(
+            f'{"payload":<16}{"renderer":<14}{"ms":>9}{"bytes":>11}'
+            f'{"vs drf":>9}'
+        )
+        for name, data in self.get_payloads(options['page_size']).items():
+            baseline = None
+            for label, renderer in candidates.items():
+                size = len(renderer.render(data))
+                # Лучший из повторов меньше всего зависит от шума.
+                elapsed = min(repeat(
+                    lambda: renderer.render(data),
+                    number=1,
+                    repeat=options['repeat'],
+                )) * 1000
+                if label == 'drf':
+                    baseline = elapsed
+                speedup = (
+                    f'{baseline / elapsed:.1f}x' if baseline else '-'
+                )
+                self.stdout.write(
+                    f'{name:<16}{label:<14}{elapsed:>9.2f}{size:>11}'
+                    f'{speedup:>9}'
+                )
@@ -0,0 +1,63 @@
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+
+from api.benchmark import create_author, create_recipes
+from api.pagination import KeysetPagination
+from foodgram.settings import CUSTOM_PAGE_SIZE
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Compare latency of the first and a deep page of /api/recipes/ '
+            'for page number and cursor pagination. Test data is created '
+            'in a rolled back transaction.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def seed(self, recipes):
+        author = create_author('bench_pagination')
+        create_recipes([author.id], recipes)
+
+    def measure(self, client, url, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            response = client.get(url)
+            timings.append(perf_counter() - start)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: {response.status_code}')
+        return median(timings) * 1000
+
+    def handle(self, *args, **options):
+        page = options['page']
+        if page < 2:
+            raise CommandError('--page должен быть больше 1.')
+        client = Client(HTTP_HOST='localhost')
+        with transaction.atomic():
+            self.seed(page * CUSTOM_PAGE_SIZE)
+            queryset = Recipe.objects.all()
+            ordering = KeysetPagination.get_ordering(queryset)
+            previous = queryset.order_by(*ordering)[
+                (page - 1) * CUSTOM_PAGE_SIZE - 1
+            ]
+            cursor = KeysetPagination.encode_cursor(
+                KeysetPagination.get_position(previous, ordering)
+            )
+            urls = (
+                ('page', 1, '/api/recipes/'),
+                ('page', page, f'/api/recipes/?page={page}'),
+                ('cursor', 1, '/api/recipes/?pagination=cursor'),
+                ('cursor', page, f'/api/recipes/?cursor={cursor}'),
+            )
+            for mode, number, url in urls:
+                self.stdout.write(
+                    f'{mode:<6} page {number:>6}: '
+                    f'{self.measure(client, url, options["repeat"]):8.2f} ms'
+                )
+            transaction.set_rollback(True)
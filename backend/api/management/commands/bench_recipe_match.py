@@ -0,0 +1,99 @@
+from random import Random
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+
+from api.benchmark import (
+    BATCH_SIZE,
+    create_author,
+    create_ingredients,
+    create_recipes,
+)
+from api.cache import bump_table_version
+from api.matching import recipe_matcher
+from recipes.models import IngredientsList, Recipe
+
+
+class Command(BaseCommand):
+    help = ('Measure /api/recipes/match/ latency over synthetic recipes. '
+            'Test data is created in a rolled back transaction.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--per-recipe', type=int, default=8)
+        parser.add_argument('--query-size', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def seed(self, options, random):
+        author = create_author('bench_recipe_match')
+        ingredients = create_ingredients(
+            'bench_recipe_match', options['ingredients']
+        )
+        recipes = create_recipes(
+            [author.id], options['recipes'], random=random
+        )
+        # Популярность ингредиентов по закону Ципфа: соль и лук
+        # встречаются почти везде, экзотика - в единицах рецептов.
+        weights = [1 / rank for rank in range(1, len(ingredients) + 1)]
+        IngredientsList.objects.bulk_create(
+            (
+                IngredientsList(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=1,
+                )
+                for recipe_id in recipes
+                for ingredient_id in set(random.choices(
+                    ingredients, weights, k=options['per_recipe']
+                ))
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        bump_table_version(Recipe)
+        return ingredients, weights
+
+    def handle(self, *args, **options):
+        if options['query_size'] < 1 or options['per_recipe'] < 1:
+            raise CommandError('--query-size и --per-recipe больше 0.')
+        random = Random(options['seed'])
+        client = Client(HTTP_HOST='localhost')
+        try:
+            with transaction.atomic():
+                start = perf_counter()
+                ingredients, weights = self.seed(options, random)
+                self.stdout.write(f'seed: {perf_counter() - start:.1f} s')
+                start = perf_counter()
+                # Построение в этом потоке, чтобы измерить его время.
+                recipe_matcher.refresh(wait=True)
+                self.stdout.write(
+                    f'index build: {(perf_counter() - start) * 1000:.0f} ms'
+                )
+                timings = []
+                for _ in range(options['repeat']):
+                    query = '&'.join(
+                        f'ingredients={ingredient_id}'
+                        for ingredient_id in set(random.choices(
+                            ingredients, weights, k=options['query_size']
+                        ))
+                    )
+                    start = perf_counter()
+                    response = client.get(f'/api/recipes/match/?{query}')
+                    timings.append(perf_counter() - start)
+                    if response.status_code != 200:
+                        raise CommandError(response.content)
+                timings.sort()
+                p95 = timings[int(len(timings) * 0.95) - 1]
+                self.stdout.write(
+                    f'{options["recipes"]} recipes: '
+                    f'p50={median(timings) * 1000:.1f} ms  '
+                    f'p95={p95 * 1000:.1f} ms  '
+                    f'max={timings[-1] * 1000:.1f} ms'
+                )
+                transaction.set_rollback(True)
+        finally:
+            bump_table_version(Recipe)
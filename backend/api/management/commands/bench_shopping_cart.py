@@ -0,0 +1,112 @@
+import tracemalloc
+from random import Random
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.aggregates import Sum
+from django.http.response import HttpResponse
+
+from api.benchmark import (
+    BATCH_SIZE,
+    create_author,
+    create_ingredients,
+    create_recipes,
+)
+from api.exporters import SHOPPING_CART_RENDERERS, stream_shopping_cart
+from recipes.models import IngredientsList, ShoppingCart
+
+
+def legacy_shopping_cart(ingredients):
+    shopping_cart = 'Список покупок:'
+    for ingredient in ingredients:
+        shopping_cart += (
+            f"\n * {ingredient['ingredient__name']} "
+            f"- {ingredient['amount']}"
+            f", {ingredient['ingredient__measurement_unit']}")
+    return HttpResponse(shopping_cart, content_type='text/plain')
+
+
+class Command(BaseCommand):
+    help = ('Compare time-to-first-byte and peak memory of the shopping '
+            'cart export. Test data is created in a rolled back transaction.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=500)
+        parser.add_argument('--ingredients', type=int, default=5000)
+        parser.add_argument('--per-recipe', type=int, default=20)
+
+    def seed(self, recipes, ingredients, per_recipe):
+        random = Random(0)
+        user = create_author('bench_shopping_cart')
+        catalog = create_ingredients('Ингредиент', ingredients)
+        cart = create_recipes([user.id], recipes, random=random)
+        IngredientsList.objects.bulk_create(
+            (
+                IngredientsList(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=random.randint(1, 999),
+                )
+                for recipe_id in cart
+                for ingredient_id in random.sample(catalog, per_recipe)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        ShoppingCart.objects.bulk_create(
+            ShoppingCart(user=user, recipe_id=recipe_id) for recipe_id in cart
+        )
+        return user
+
+    @staticmethod
+    def get_ingredients(user):
+        return IngredientsList.objects.filter(
+            recipe__shopping_cart__user=user
+        ).order_by('ingredient__name').values(
+            'ingredient__name',
+            'ingredient__measurement_unit'
+        ).annotate(amount=Sum('amount'))
+
+    @staticmethod
+    def measure(build):
+        tracemalloc.start()
+        start = perf_counter()
+        content = build()
+        first_byte = None
+        size = 0
+        for chunk in content:
+            if first_byte is None:
+                first_byte = perf_counter() - start
+            size += len(chunk)
+        total = perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return first_byte, total, peak, size
+
+    def report(self, name, result):
+        first_byte, total, peak, size = result
+        self.stdout.write(
+            f'{name:<10} ttfb={first_byte * 1000:8.1f} ms  '
+            f'total={total * 1000:8.1f} ms  '
+            f'peak={peak / 1024:9.1f} KiB  size={size / 1024:9.1f} KiB'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.seed(
+                options['recipes'],
+                options['ingredients'],
+                options['per_recipe'],
+            )
+            self.report('legacy', self.measure(
+                lambda: [legacy_shopping_cart(
+                    self.get_ingredients(user)
+                ).content]
+            ))
+            for extension, renderer in SHOPPING_CART_RENDERERS.items():
+                self.report(extension, self.measure(
+                    lambda: stream_shopping_cart(
+                        self.get_ingredients(user).iterator(), renderer
+                    ).streaming_content
+                ))
+            transaction.set_rollback(True)
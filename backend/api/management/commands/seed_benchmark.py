@@ -0,0 +1,196 @@
+from random import Random
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from api.benchmark import BATCH_SIZE, create_ingredients, create_recipes
+from api.cache import bump_table_version
+from recipes.counters import recount
+from recipes.models import (
+    Ingredient,
+    IngredientsList,
+    Recipe,
+    ShoppingCart,
+    Tag,
+    UserFavourite,
+)
+from recipes.rankings import refresh
+from recipes.shopping_list import rebuild
+from users.models import Subscribe
+
+
+User = get_user_model()
+
+PASSWORD = 'benchmark-password'
+
+
+class Command(BaseCommand):
+    help = ('Seed users, recipes, subscriptions, favourites and carts for '
+            'bench_api with bulk inserts. Users are named <prefix><n>, '
+            f'their password is "{PASSWORD}".')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench_')
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--tags', type=int, default=5)
+        parser.add_argument('--per-recipe', type=int, default=8)
+        parser.add_argument('--subscriptions', type=int, default=20)
+        parser.add_argument('--favorites', type=int, default=20)
+        parser.add_argument('--cart', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def step(self, name, start):
+        self.stdout.write(f'{name}: {perf_counter() - start:.1f} s')
+        return perf_counter()
+
+    def create_users(self, prefix, count):
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f'{prefix}{number}',
+                    email=f'{prefix}{number}@example.com',
+                    first_name='Benchmark',
+                    last_name=str(number),
+                    password=password,
+                )
+                for number in range(count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        # bulk_create в Django 3.2 заполняет pk только на PostgreSQL.
+        user_ids = list(User.objects.filter(
+            username__startswith=prefix
+        ).order_by('id').values_list('id', flat=True))
+        Token.objects.bulk_create(
+            (
+                Token(key=Token.generate_key(), user_id=user_id)
+                for user_id in user_ids
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        return user_ids
+
+    def get_tags(self, prefix, count):
+        Tag.objects.bulk_create(
+            (
+                Tag(
+                    name=f'{prefix}tag {number}',
+                    slug=f'{prefix}tag_{number}',
+                    color=f'#{number * 0x30 % 0x1000000:06X}',
+                )
+                for number in range(count)
+            ),
+            ignore_conflicts=True,
+        )
+        return list(Tag.objects.filter(
+            slug__startswith=f'{prefix}tag_'
+        ).values_list('id', flat=True))
+
+    def get_ingredients(self, prefix, count):
+        """Берёт загруженные ингредиенты, недостающие создаёт."""
+        missing = count - Ingredient.objects.count()
+        if missing > 0:
+            create_ingredients(f'{prefix}ingredient', missing)
+            bump_table_version(Ingredient)
+        return list(Ingredient.objects.order_by('id').values_list(
+            'id', flat=True
+        )[:count])
+
+    @staticmethod
+    def pairs(random, left_ids, right_ids, per_left, exclude_self=False):
+        """Случайные уникальные пары (left, right), до per_left на left."""
+        for left_id in left_ids:
+            for right_id in random.sample(
+                right_ids, min(per_left, len(right_ids))
+            ):
+                if not exclude_self or left_id != right_id:
+                    yield left_id, right_id
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f'Пользователи с префиксом "{prefix}" уже есть, '
+                'укажите другой --prefix.'
+            )
+        if options['users'] < 1 or options['recipes'] < 1:
+            raise CommandError('--users и --recipes больше 0.')
+        random = Random(options['seed'])
+        start = total = perf_counter()
+        with transaction.atomic():
+            user_ids = self.create_users(prefix, options['users'])
+            tag_ids = self.get_tags(prefix, options['tags'])
+            ingredient_ids = self.get_ingredients(
+                prefix, options['ingredients']
+            )
+            start = self.step('users, tags, ingredients', start)
+            recipe_ids = create_recipes(
+                user_ids, options['recipes'], f'{prefix}recipe', random
+            )
+            Recipe.tags.through.objects.bulk_create(
+                (
+                    Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+                    for recipe_id, tag_id in self.pairs(
+                        random, recipe_ids, tag_ids, 2
+                    )
+                ),
+                batch_size=BATCH_SIZE,
+            )
+            IngredientsList.objects.bulk_create(
+                (
+                    IngredientsList(
+                        recipe_id=recipe_id,
+                        ingredient_id=ingredient_id,
+                        amount=random.randint(1, 500),
+                    )
+                    for recipe_id, ingredient_id in self.pairs(
+                        random, recipe_ids, ingredient_ids,
+                        options['per_recipe']
+                    )
+                ),
+                batch_size=BATCH_SIZE,
+            )
+            start = self.step('recipes', start)
+            Subscribe.objects.bulk_create(
+                (
+                    Subscribe(subscriber_id=subscriber_id, author_id=author_id)
+                    for subscriber_id, author_id in self.pairs(
+                        random, user_ids, user_ids,
+                        options['subscriptions'], exclude_self=True
+                    )
+                ),
+                batch_size=BATCH_SIZE,
+            )
+            for model, per_user in (
+                (UserFavourite, options['favorites']),
+                (ShoppingCart, options['cart']),
+            ):
+                model.objects.bulk_create(
+                    (
+                        model(user_id=user_id, recipe_id=recipe_id)
+                        for user_id, recipe_id in self.pairs(
+                            random, user_ids, recipe_ids, per_user
+                        )
+                    ),
+                    batch_size=BATCH_SIZE,
+                )
+            start = self.step('subscriptions, favourites, carts', start)
+            # bulk_create не отправляет сигналы: счётчики и списки
+            # покупок и рейтинги пересчитываются целиком.
+            recount()
+            for position in range(0, len(user_ids), 500):
+                rebuild(user_ids[position:position + 500])
+            refresh()
+            self.step('counters, shopping lists, rankings', start)
+        bump_table_version(Recipe)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(user_ids)}, '
+            f'рецептов {len(recipe_ids)} за {perf_counter() - total:.1f} s'
+        ))
@@ -0,0 +1,95 @@
+from array import array
+from collections import Counter, defaultdict
+from heapq import nlargest
+from itertools import chain
+from operator import itemgetter
+
+from api.indexes import VersionedIndex
+from recipes.models import Ingredient, IngredientsList, Recipe
+
+
+class RecipeMatcher(VersionedIndex):
+    """Подбор рецептов по набору имеющихся у пользователя ингредиентов.
+
+    Для рецепта хранится отсортированный массив id его ингредиентов,
+    для ингредиента - массивы id рецептов, в которые он входит,
+    сгруппированные по числу ингредиентов рецепта. Пересечения считаются
+    проходом Counter по массивам запрошенных ингредиентов, без соединений
+    в базе. При одинаковом размере рецепта обе метрики растут вместе с
+    числом совпадений, поэтому из каждой группы достаточно взять limit
+    лучших по совпадениям. Индекс перестраивается при смене версии
+    таблиц Recipe или Ingredient.
+    """
+    metrics = ('coverage', 'jaccard')
+    models = (Recipe, Ingredient)
+    empty = ({}, {})
+
+    def build(self):
+        recipes = defaultdict(list)
+        for recipe_id, ingredient_id in IngredientsList.objects.order_by(
+        ).values_list('recipe_id', 'ingredient_id').iterator(
+            chunk_size=10000
+        ):
+            recipes[recipe_id].append(ingredient_id)
+        ingredient_sets = {}
+        postings = defaultdict(lambda: defaultdict(lambda: array('q')))
+        for recipe_id in sorted(recipes, reverse=True):
+            ingredient_ids = array('q', sorted(set(recipes[recipe_id])))
+            ingredient_sets[recipe_id] = ingredient_ids
+            for ingredient_id in ingredient_ids:
+                postings[ingredient_id][len(ingredient_ids)].append(
+                    recipe_id
+                )
+        return (
+            ingredient_sets,
+            {
+                ingredient_id: dict(by_size)
+                for ingredient_id, by_size in postings.items()
+            },
+        )
+
+    def match(self, ingredient_ids, limit, metric='coverage'):
+        """Лучшие рецепты для набора ингредиентов.
+
+        coverage - доля ингредиентов рецепта, которые есть в наборе,
+        jaccard - отношение пересечения к объединению. Возвращает список
+        (id рецепта, совпало, coverage, jaccard, id недостающих).
+        """
+        self.refresh()
+        ingredient_sets, postings = self.entries
+        query = set(ingredient_ids)
+        by_size = defaultdict(list)
+        for ingredient_id in query:
+            for size, recipe_ids in postings.get(ingredient_id, {}).items():
+                by_size[size].append(recipe_ids)
+        candidates = []
+        for size, recipe_ids in by_size.items():
+            overlaps = Counter(chain.from_iterable(recipe_ids))
+            for recipe_id, matched in nlargest(
+                limit, overlaps.items(), itemgetter(1)
+            ):
+                coverage = matched / size
+                jaccard = matched / (size + len(query) - matched)
+                score = jaccard if metric == 'jaccard' else coverage
+                candidates.append(
+                    (score, matched, recipe_id, coverage, jaccard)
+                )
+        return [
+            (
+                recipe_id,
+                matched,
+                coverage,
+                jaccard,
+                [
+                    ingredient_id
+                    for ingredient_id in ingredient_sets[recipe_id]
+                    if ingredient_id not in query
+                ],
+            )
+            for _, matched, recipe_id, coverage, jaccard in nlargest(
+                limit, candidates
+            )
+        ]
+
+
+recipe_matcher = RecipeMatcher()
@@ -0,0 +1,163 @@
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+
+from rest_framework.serializers import BaseSerializer
+
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+current_sample = ContextVar('current_sample', default=None)
+
+
+class Sample:
+    """Замеры одного запроса, попавшего в выборку."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка connection.execute_wrapper: число и время запросов."""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += perf_counter() - start
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {total}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {total}'
+
+
+class Registry:
+    """Счётчики по представлениям в памяти процесса.
+
+    Каждый процесс приложения отдаёт только свои значения, поэтому
+    при нескольких воркерах их нужно собирать с каждого отдельно.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.requests = defaultdict(int)
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+        self.db_time = defaultdict(float)
+        self.serializer_time = defaultdict(float)
+
+    def observe(self, view, method, status, latency, sample=None):
+        with self.lock:
+            self.requests[(view, method, status)] += 1
+            self.latency[view].observe(latency)
+            if sample is not None:
+                self.queries[view].observe(sample.queries)
+                self.db_time[view] += sample.db_time
+                self.serializer_time[view] += sample.serializer_time
+
+    def render(self):
+        """Текстовый формат Prometheus 0.0.4."""
+        with self.lock:
+            lines = [
+                '# HELP foodgram_requests_total Requests by view, method '
+                'and status.',
+                '# TYPE foodgram_requests_total counter',
+            ]
+            for (view, method, status), count in sorted(
+                self.requests.items()
+            ):
+                lines.append(
+                    f'foodgram_requests_total{{view="{view}",'
+                    f'method="{method}",status="{status}"}} {count}'
+                )
+            lines += [
+                '# HELP foodgram_request_duration_seconds Request latency.',
+                '# TYPE foodgram_request_duration_seconds histogram',
+            ]
+            for view, histogram in sorted(self.latency.items()):
+                lines += histogram.lines(
+                    'foodgram_request_duration_seconds', f'view="{view}"'
+                )
+            lines += [
+                '# HELP foodgram_db_queries SQL queries per sampled '
+                'request.',
+                '# TYPE foodgram_db_queries histogram',
+            ]
+            for view, histogram in sorted(self.queries.items()):
+                lines += histogram.lines(
+                    'foodgram_db_queries', f'view="{view}"'
+                )
+            for name, values, help_text in (
+                ('foodgram_db_seconds_total', self.db_time,
+                 'SQL time of sampled requests.'),
+                ('foodgram_serializer_seconds_total', self.serializer_time,
+                 'Serializer time of sampled requests.'),
+            ):
+                lines += [
+                    f'# HELP {name} {help_text}',
+                    f'# TYPE {name} counter',
+                ]
+                for view, value in sorted(values.items()):
+                    lines.append(f'{name}{{view="{view}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def get_view_name(request):
+    """ViewSet.action для DRF, имя маршрута для остальных представлений."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name
+    actions = getattr(match.func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+def install_serializer_timer():
+    """Оборачивает BaseSerializer.data замером времени сериализации.
+
+    Вложенные сериализаторы вызываются внутри внешнего и отдельно не
+    учитываются. Время включает запросы, сделанные при сериализации.
+    """
+    data = BaseSerializer.data
+
+    def timed_data(serializer):
+        sample = current_sample.get()
+        if sample is None or sample.serializing:
+            return data.fget(serializer)
+        sample.serializing = True
+        start = perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            sample.serializer_time += perf_counter() - start
+            sample.serializing = False
+
+    BaseSerializer.data = property(timed_data)
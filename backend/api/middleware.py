@@ -0,0 +1,157 @@
+import gzip
+from contextlib import ExitStack
+from random import random
+from time import perf_counter
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from api.metrics import Sample, current_sample, get_view_name, registry
+from foodgram.settings import (
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_ENABLED,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MIN_SIZE,
+    METRICS_ENABLED,
+    METRICS_SAMPLE_RATE,
+    METRICS_SERVER_TIMING,
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/',
+)
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+
+def choose_encoding(accept_encoding):
+    """Кодировка по Accept-Encoding с учётом q, при равных - br."""
+    qualities = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.partition(';')
+        name, params = name.strip().lower(), params.strip()
+        try:
+            qualities[name] = (
+                float(params[2:]) if params.startswith('q=') else 1
+            )
+        except ValueError:
+            qualities[name] = 0
+    default = qualities.get('*', 0)
+    quality, _, encoding = max(
+        (qualities.get(name, default), -position, name)
+        for position, name in enumerate(ENCODINGS)
+    )
+    return encoding if quality > 0 else None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=COMPRESSION_GZIP_LEVEL)
+
+
+class MetricsMiddleware:
+    """Время ответа каждого запроса по представлениям.
+
+    Для доли METRICS_SAMPLE_RATE запросов дополнительно считаются
+    SQL-запросы, их время и время сериализаторов; такие ответы получают
+    заголовок Server-Timing. Для потоковых ответов время измеряется до
+    начала передачи тела.
+    """
+
+    def __init__(self, get_response):
+        if not METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample = Sample() if random() < METRICS_SAMPLE_RATE else None
+        start = perf_counter()
+        if sample is None:
+            response = self.get_response(request)
+        else:
+            token = current_sample.set(sample)
+            try:
+                with ExitStack() as stack:
+                    for connection in connections.all():
+                        stack.enter_context(
+                            connection.execute_wrapper(sample)
+                        )
+                    response = self.get_response(request)
+            finally:
+                current_sample.reset(token)
+        latency = perf_counter() - start
+        registry.observe(
+            get_view_name(request),
+            request.method,
+            response.status_code,
+            latency,
+            sample,
+        )
+        if sample is not None and METRICS_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'db;dur={sample.db_time * 1000:.1f};'
+                f'desc="{sample.queries} queries", '
+                f'serializer;dur={sample.serializer_time * 1000:.1f}, '
+                f'total;dur={latency * 1000:.1f}'
+            )
+        return response
+
+
+def is_compressible(response):
+    return (
+        not response.streaming
+        and not response.has_header('Content-Encoding')
+        and len(response.content) >= COMPRESSION_MIN_SIZE
+        and response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+    )
+
+
+def compress_response(request, response, compress=compress):
+    """Сжимает тело ответа по Accept-Encoding.
+
+    compress(content, encoding) можно подменить, например чтением
+    готового сжатого варианта из кэша.
+    """
+    if not is_compressible(response):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if encoding is None:
+        return response
+    content = compress(response.content, encoding)
+    if len(content) >= len(response.content):
+        return response
+    response.content = content
+    response['Content-Length'] = str(len(content))
+    response['Content-Encoding'] = encoding
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    return response
+
+
+class CompressionMiddleware:
+    """Сжатие текстовых ответов brotli или gzip по Accept-Encoding.
+
+    Потоковые ответы (файлы списка покупок) и ответы короче
+    COMPRESSION_MIN_SIZE отдаются как есть. Сильный ETag сжатого ответа
+    становится слабым, как в GZipMiddleware.
+    """
+
+    def __init__(self, get_response):
+        if not COMPRESSION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return compress_response(request, self.get_response(request))
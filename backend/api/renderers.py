@@ -0,0 +1,66 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from foodgram.settings import API_ORJSON
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if not API_ORJSON:
+    orjson = None
+
+# Даты отдаются кодировщику DRF, чтобы формат совпадал с JSONRenderer.
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    if orjson else 0
+)
+LINE_SEPARATORS = (
+    ('\u2028'.encode(), b'\\u2028'),
+    ('\u2029'.encode(), b'\\u2029'),
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Компактный JSON в UTF-8 через orjson.
+
+    Типы, которых orjson не знает (Decimal, ленивые строки, даты),
+    кодируются так же, как в JSONRenderer. Без orjson и для ответов
+    с отступами (?indent, обзорный API) работает JSONRenderer.
+    """
+    ensure_ascii = False
+    compact = True
+    default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        content = orjson.dumps(
+            data, default=self.default, option=ORJSON_OPTIONS
+        )
+        # Как JSONRenderer: ответ остаётся подмножеством JavaScript.
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in content:
+                content = content.replace(separator, escaped)
+        return content
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser на orjson, без orjson - стандартный json."""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if orjson is None or encoding.lower() not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as error:
+            raise ParseError(f'JSON parse error - {error}')
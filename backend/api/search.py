@@ -0,0 +1,142 @@
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+from api.indexes import VersionedIndex
+from recipes.models import Ingredient, IngredientsList, Recipe
+
+
+WORD_RE = re.compile(r'\w+')
+
+# Грубая замена стеммера: окончания отбрасываются, а слово запроса
+# сравнивается с началом слов индекса.
+ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'иях',
+    'ах', 'ях', 'ов', 'ев', 'ей', 'ой', 'ый', 'ий', 'ая', 'яя', 'ое', 'ее',
+    'ые', 'ие', 'ую', 'юю', 'ом', 'ем', 'ам', 'ям',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True)
+MIN_STEM_LENGTH = 3
+
+
+class IngredientIndex(VersionedIndex):
+    """Отсортированный массив названий ингредиентов в памяти процесса.
+
+    Перестраивается, когда меняется версия таблицы Ingredient.
+    """
+    models = (Ingredient,)
+    empty = ([], [])
+
+    def build(self):
+        rows = sorted(
+            (name.casefold(), pk)
+            for pk, name in Ingredient.objects.values_list('id', 'name')
+        )
+        return (
+            [key for key, _ in rows],
+            [pk for _, pk in rows],
+        )
+
+    def search(self, query, limit=None):
+        """Сначала совпадения по началу названия, затем по вхождению."""
+        self.refresh()
+        keys, ids = self.entries
+        query = query.casefold()
+        start = bisect_left(keys, query)
+        end = start
+        while end < len(keys) and keys[end].startswith(query):
+            end += 1
+        result = ids[start:end]
+        if limit is not None and len(result) >= limit:
+            return result[:limit]
+        for position, key in enumerate(keys):
+            if start <= position < end or query not in key:
+                continue
+            result.append(ids[position])
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+
+def stem(word):
+    for ending in ENDINGS:
+        if (word.endswith(ending)
+                and len(word) - len(ending) >= MIN_STEM_LENGTH):
+            return word[:-len(ending)]
+    return word
+
+
+def tokenize(text):
+    return [
+        stem(word)
+        for word in WORD_RE.findall(text.casefold().replace('ё', 'е'))
+    ]
+
+
+class RecipeIndex(VersionedIndex):
+    """Инвертированный индекс рецептов для баз без tsvector (SQLite).
+
+    Слово -> {id рецепта: вес}. Веса полей как у ts_rank по умолчанию:
+    название 1.0, описание 0.4, ингредиенты 0.2. Индекс перестраивается
+    при смене версии таблиц Recipe или Ingredient.
+    """
+    weights = {'name': 1.0, 'text': 0.4, 'ingredients': 0.2}
+    models = (Recipe, Ingredient)
+    empty = ([], {})
+
+    def build(self):
+        postings = defaultdict(lambda: defaultdict(float))
+
+        def add(recipe_id, text, weight):
+            for term in tokenize(text):
+                postings[term][recipe_id] += weight
+
+        for pk, name, text in Recipe.objects.values_list(
+            'id', 'name', 'text'
+        ).iterator():
+            add(pk, name, self.weights['name'])
+            add(pk, text, self.weights['text'])
+        for recipe_id, name in IngredientsList.objects.values_list(
+            'recipe_id', 'ingredient__name'
+        ).iterator():
+            add(recipe_id, name, self.weights['ingredients'])
+        return (
+            sorted(postings),
+            {term: dict(recipes) for term, recipes in postings.items()},
+        )
+
+    def match(self, term):
+        """Веса рецептов по всем словам индекса, начинающимся с term."""
+        terms, postings = self.entries
+        scores = defaultdict(float)
+        position = bisect_left(terms, term)
+        while position < len(terms) and terms[position].startswith(term):
+            for recipe_id, weight in postings[terms[position]].items():
+                scores[recipe_id] += weight
+            position += 1
+        return scores
+
+    def search(self, query, limit=None):
+        """(id, вес) рецептов со всеми словами запроса, лучшие первыми."""
+        self.refresh()
+        scores = None
+        for term in tokenize(query):
+            matched = self.match(term)
+            if scores is None:
+                scores = matched
+            else:
+                scores = {
+                    recipe_id: scores[recipe_id] + weight
+                    for recipe_id, weight in matched.items()
+                    if recipe_id in scores
+                }
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return ranked[:limit]
+
+
+ingredient_index = IngredientIndex()
+recipe_index = RecipeIndex()
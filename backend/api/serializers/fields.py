@@ -0,0 +1,88 @@
+from collections import Counter
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework import serializers
+
+from foodgram.settings import RECIPE_IMAGE_MAX_PIXELS, RECIPE_IMAGE_MAX_SIZE
+from recipes.images import SOURCE_KEY
+
+
+def resolve_ids(queryset, pks):
+    """Объекты по списку id одним in_bulk, в порядке списка.
+
+    Отсутствующие и повторяющиеся id перечисляются в одной ошибке.
+    """
+    objects = queryset.in_bulk(set(pks))
+    name = queryset.model._meta.verbose_name_plural
+    errors = []
+    missing = [pk for pk in dict.fromkeys(pks) if pk not in objects]
+    if missing:
+        errors.append(
+            f'{name} не найдены: {", ".join(map(str, missing))}.'
+        )
+    duplicates = [pk for pk, count in Counter(pks).items() if count > 1]
+    if duplicates:
+        errors.append(
+            f'{name} повторяются: {", ".join(map(str, duplicates))}.'
+        )
+    if errors:
+        raise serializers.ValidationError(errors)
+    return [objects[pk] for pk in pks]
+
+
+class ImageVariantsField(serializers.Field):
+    """Ссылки на уменьшенные копии изображения: {'small': url, ...}."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, variants):
+        request = self.context.get('request')
+        urls = {}
+        for key, path in variants.items():
+            if key == SOURCE_KEY:
+                continue
+            url = default_storage.url(path)
+            urls[key] = request.build_absolute_uri(url) if request else url
+        return urls
+
+
+class Base64OrFileImageField(Base64ImageField):
+    """Изображение строкой Base64 (JSON) или файлом из multipart/form-data.
+
+    Файл из multipart уже записан обработчиком загрузки на диск,
+    поэтому его содержимое не копируется в память ещё раз. Размер файла
+    и число пикселей ограничены RECIPE_IMAGE_MAX_SIZE
+    и RECIPE_IMAGE_MAX_PIXELS.
+    """
+    default_error_messages = {
+        'too_large': 'Файл больше {max_size} МБ.',
+        'too_many_pixels': 'Изображение больше {max_pixels} Мпикс.',
+    }
+
+    def fail_too_large(self):
+        self.fail('too_large', max_size=RECIPE_IMAGE_MAX_SIZE // 2 ** 20)
+
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            if data.size > RECIPE_IMAGE_MAX_SIZE:
+                self.fail_too_large()
+            file = serializers.ImageField.to_internal_value(self, data)
+        else:
+            # Длина Base64 на треть больше данных: проверка до декодирования.
+            if isinstance(data, str) and (
+                len(data) * 3 // 4 > RECIPE_IMAGE_MAX_SIZE
+            ):
+                self.fail_too_large()
+            file = super().to_internal_value(data)
+            if file is None:
+                return file
+        # Заголовок уже прочитан Pillow при проверке, пиксели ещё нет.
+        width, height = file.image.size
+        if width * height > RECIPE_IMAGE_MAX_PIXELS:
+            self.fail('too_many_pixels',
+                      max_pixels=RECIPE_IMAGE_MAX_PIXELS // 10 ** 6)
+        return file
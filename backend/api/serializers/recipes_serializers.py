@@ -1,8 +1,28 @@
+import json
+
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import QueryDict
 from rest_framework import serializers
 from drf_extra_fields.fields import Base64ImageField
 
-from api.serializers.user_serializers import UserSerializer
+from api.serializers.fields import (
+    Base64OrFileImageField,
+    ImageVariantsField,
+    resolve_ids,
+)
+from api.matching import RecipeMatcher
+from api.serializers.user_serializers import (
+    SubscribeRecipeSerializer,
+    UserSerializer,
+)
+from foodgram.settings import (
+    RECIPE_BATCH_MAX_SIZE,
+    RECIPE_MATCH_DEFAULT_LIMIT,
+    RECIPE_MATCH_MAX_INGREDIENTS,
+    RECIPE_MATCH_MAX_LIMIT,
+)
 from users.models import Subscribe
 from recipes.models import (
     Tag,
@@ -12,6 +32,7 @@ from recipes.models import (
     ShoppingCart,
     UserFavourite,
 )
+from recipes import shopping_list
 
 
 User = get_user_model()
@@ -56,8 +77,9 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
 
 
 class IngredientsInListEditSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
+    # Ингредиенты загружаются разом в RecipeEditSerializer.
+    id = serializers.IntegerField(
+        min_value=1,
         source='ingredient'
     )
     amount = serializers.IntegerField()
@@ -95,6 +117,9 @@ class RecipeUserSerializer(serializers.ModelSerializer):
         user = self.context['request'].user
         if not user.is_authenticated:
             return False
+        subscriptions = self.context.get('subscriptions')
+        if subscriptions is not None:
+            return obj.id in subscriptions
         return Subscribe.objects.filter(subscriber=user, author=obj).exists()
 
 
@@ -114,18 +139,28 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     image = Base64ImageField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
-        fields = '__all__'
+        exclude = (
+            'favorites_count',
+            'in_carts_count',
+            'search_vector',
+            'updated_at',
+        )
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
         return obj.user_favorite.filter(user=user).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
@@ -136,13 +171,12 @@ class RecipeEditSerializer(serializers.ModelSerializer):
     author = UserSerializer(
         read_only=True
     )
-    image = Base64ImageField(
+    image = Base64OrFileImageField(
         max_length=None,
         use_url=True
     )
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Tag.objects.all()
+    tags = serializers.ListField(
+        child=serializers.IntegerField(min_value=1)
     )
     ingredients = IngredientsInListEditSerializer(
         many=True
@@ -153,28 +187,47 @@ class RecipeEditSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('author',)
 
+    def to_internal_value(self, data):
+        if isinstance(data, QueryDict):
+            data = self.parse_multipart(data)
+        return super().to_internal_value(data)
+
+    @staticmethod
+    def parse_multipart(data):
+        """Поля multipart: tags - повтором или JSON, ingredients - JSON."""
+        parsed = data.dict()
+        field = None
+        try:
+            if 'tags' in data:
+                field = 'tags'
+                tags = data.getlist('tags')
+                if len(tags) == 1 and tags[0].startswith('['):
+                    tags = json.loads(tags[0])
+                parsed['tags'] = tags
+            if 'ingredients' in data:
+                field = 'ingredients'
+                parsed['ingredients'] = json.loads(data['ingredients'])
+        except ValueError:
+            raise serializers.ValidationError(
+                {field: 'В multipart/form-data ожидается JSON-список.'}
+            )
+        return parsed
+
     def validate_tags(self, tags):
         if not tags:
             raise serializers.ValidationError('Нужен хотя бы один'
                                               ' тэг для рецепта!')
-        for tag in tags:
-            if not Tag.objects.filter(id=tag.id).exists():
-                raise serializers.ValidationError(
-                    f'Тэга "{tag}" не существует')
-        return tags
+        return resolve_ids(Tag.objects.all(), tags)
 
     def validate_ingredients(self, ingredients):
-        ingredients_list = [
-            item['ingredient'] for item in ingredients
-        ]
-        if not ingredients_list:
+        if not ingredients:
             raise serializers.ValidationError('Список ингреиентов не'
                                               ' может быть пустым!')
-        all_count_ingredients = len(ingredients_list)
-        distinct_count_ingredients = len(set(ingredients_list))
-        if not all_count_ingredients == distinct_count_ingredients:
-            raise serializers.ValidationError('Ингредиенты должны'
-                                              ' быть уникальными')
+        for item, ingredient in zip(ingredients, resolve_ids(
+            Ingredient.objects.all(),
+            [item['ingredient'] for item in ingredients]
+        )):
+            item['ingredient'] = ingredient
         return ingredients
 
     def validate_cooking_time(self, cooking_time):
@@ -195,6 +248,7 @@ class RecipeEditSerializer(serializers.ModelSerializer):
             for ingredient in ingredients
         )
 
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
@@ -206,15 +260,73 @@ class RecipeEditSerializer(serializers.ModelSerializer):
         self.create_ingredients(recipe, ingredients)
         return recipe
 
+    @staticmethod
+    def update_tags(recipe, tags):
+        current = set(recipe.tags.values_list('id', flat=True))
+        submitted = {tag.id for tag in tags}
+        if current - submitted:
+            recipe.tags.remove(*(current - submitted))
+        if submitted - current:
+            recipe.tags.add(*(submitted - current))
+
+    @classmethod
+    def update_ingredients(cls, recipe, ingredients):
+        current = {
+            item.ingredient_id: item
+            for item in IngredientsList.objects.filter(recipe=recipe)
+        }
+        submitted = {
+            item['ingredient'].id: item for item in ingredients
+        }
+        deltas = {}
+        removed = current.keys() - submitted.keys()
+        if removed:
+            IngredientsList.objects.filter(
+                recipe=recipe,
+                ingredient_id__in=removed
+            ).delete()
+            for ingredient_id in removed:
+                deltas[ingredient_id] = -current[ingredient_id].amount
+        changed = []
+        for ingredient_id, item in submitted.items():
+            row = current.get(ingredient_id)
+            if row is not None and row.amount != item['amount']:
+                deltas[ingredient_id] = item['amount'] - row.amount
+                row.amount = item['amount']
+                changed.append(row)
+        if changed:
+            IngredientsList.objects.bulk_update(changed, ('amount',))
+        added = [
+            item for ingredient_id, item in submitted.items()
+            if ingredient_id not in current
+        ]
+        if added:
+            cls.create_ingredients(recipe, added)
+            for item in added:
+                deltas[item['ingredient'].id] = item['amount']
+        shopping_list.change_recipe(recipe.id, deltas)
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.tags.clear()
-        IngredientsList.objects.filter(recipe=instance).delete()
-        instance.tags.set(validated_data.pop('tags'))
-        ingredients = validated_data.pop('ingredients')
-        self.create_ingredients(instance, ingredients)
+        tags = validated_data.pop('tags', None)
+        if tags is not None:
+            self.update_tags(instance, tags)
+        ingredients = validated_data.pop('ingredients', None)
+        if ingredients is not None:
+            self.update_ingredients(instance, ingredients)
         return super().update(instance, validated_data)
 
     def to_representation(self, instance):
+        # Те же prefetch, что в RecipesViewSet.get_queryset: без них
+        # каждый ингредиент ответа загружается отдельным запросом.
+        prefetch_related_objects(
+            [instance],
+            'tags',
+            Prefetch(
+                'recipe',
+                queryset=IngredientsList.objects.select_related('ingredient')
+            ),
+        )
         return RecipeReadSerializer(
             instance,
             context={
@@ -275,3 +387,61 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
                     self.context.get('request')
             }
         ).data
+
+
+class RecipeBatchSerializer(serializers.Serializer):
+    """Список id рецептов для пакетного избранного или корзины."""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=RECIPE_BATCH_MAX_SIZE,
+    )
+
+    def validate_recipes(self, recipe_ids):
+        """Id существующих рецептов без повторов, одним запросом.
+
+        Добавлен ли рецепт, проверяется в recipes.batch внутри транзакции.
+        """
+        recipe_ids = list(dict.fromkeys(recipe_ids))
+        found = set(Recipe.objects.filter(
+            id__in=recipe_ids
+        ).values_list('id', flat=True))
+        missing = [pk for pk in recipe_ids if pk not in found]
+        if missing:
+            raise serializers.ValidationError(
+                'Рецепты не найдены: '
+                + ', '.join(str(pk) for pk in missing)
+            )
+        return recipe_ids
+
+
+class RecipeMatchQuerySerializer(serializers.Serializer):
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=RECIPE_MATCH_MAX_INGREDIENTS,
+    )
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=RECIPE_MATCH_MAX_LIMIT,
+        default=RECIPE_MATCH_DEFAULT_LIMIT,
+    )
+    metric = serializers.ChoiceField(
+        choices=RecipeMatcher.metrics,
+        default=RecipeMatcher.metrics[0],
+    )
+
+
+class RecipeMatchSerializer(SubscribeRecipeSerializer):
+    matched = serializers.IntegerField(read_only=True)
+    coverage = serializers.FloatField(read_only=True)
+    jaccard = serializers.FloatField(read_only=True)
+    missing = IngredientSerializer(many=True, read_only=True)
+
+    class Meta(SubscribeRecipeSerializer.Meta):
+        fields = SubscribeRecipeSerializer.Meta.fields + (
+            'matched',
+            'coverage',
+            'jaccard',
+            'missing',
+        )
@@ -3,6 +3,7 @@ import django.contrib.auth.password_validation as validators
 from rest_framework import serializers
 from drf_extra_fields.fields import Base64ImageField
 
+from api.serializers.fields import ImageVariantsField
 from recipes.models import Recipe
 from users.models import Subscribe
 from foodgram.settings import ERR_AUTH_MSG
@@ -10,6 +11,13 @@ from foodgram.settings import ERR_AUTH_MSG
 User = get_user_model()
 
 
+def get_recipes_limit(request):
+    limit = request.query_params.get('recipes_limit', '')
+    if limit.isdigit():
+        return int(limit)
+    return None
+
+
 class UserCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -87,6 +95,7 @@ class UserPasswordSerializer(serializers.Serializer):
 
 class SubscribeRecipeSerializer(serializers.ModelSerializer):
     image = Base64ImageField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
@@ -94,6 +103,7 @@ class SubscribeRecipeSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'image_variants',
             'cooking_time'
         )
         read_only_fields = (
@@ -105,24 +115,14 @@ class SubscribeRecipeSerializer(serializers.ModelSerializer):
 
 
 class SubscribeSerializer(serializers.ModelSerializer):
-    id = serializers.ReadOnlyField(
-        source='author.id'
-    )
-    email = serializers.ReadOnlyField(
-        source='author.email'
-    )
-    username = serializers.ReadOnlyField(
-        source='author.username'
-    )
-    first_name = serializers.ReadOnlyField(
-        source='author.first_name'
-    )
-    last_name = serializers.ReadOnlyField(
-        source='author.last_name'
-    )
+    """Автор в ленте подписок.
+
+    Список подписок передаёт авторов с аннотацией is_subscribed
+    и заранее выбранными subscription_recipes; для одиночного
+    автора значения досчитываются запросами.
+    """
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -138,18 +138,19 @@ class SubscribeSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return Subscribe.objects.filter(
-            subscriber=obj.subscriber,
-            author=obj.author
+            subscriber=self.context['request'].user,
+            author=obj
         ).exists()
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        queryset = Recipe.objects.filter(author=obj.author)
-        if limit:
-            queryset = queryset[:int(limit)]
-        return SubscribeRecipeSerializer(queryset, many=True).data
-
-    def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj.author).count()
+        if hasattr(obj, 'subscription_recipes'):
+            recipes = obj.subscription_recipes
+        else:
+            recipes = Recipe.objects.filter(author=obj)
+            limit = get_recipes_limit(self.context['request'])
+            if limit is not None:
+                recipes = recipes[:limit]
+        return SubscribeRecipeSerializer(recipes, many=True).data
@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import get_token_cache_key, invalidate_user
+from api.cache import bump_table_version
+from recipes.models import Ingredient, Recipe, Tag
+
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_reference_version(sender, **kwargs):
+    # До фиксации транзакции параллельный запрос закэшировал бы старые
+    # данные под новой версией.
+    transaction.on_commit(lambda: bump_table_version(sender))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def bump_recipe_version(sender, **kwargs):
+    # Ингредиенты рецепта сохраняются после него в той же транзакции.
+    transaction.on_commit(lambda: bump_table_version(Recipe))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_snapshot(sender, instance, **kwargs):
+    # Сброс и сейчас, и после фиксации: запрос из другого соединения,
+    # пришедший до фиксации, снова закэшировал бы старую строку
+    # (например, is_active=True). Токены после удаления пользователя
+    # уже не найти, поэтому ключи берутся сразу.
+    token_keys = list(Token.objects.filter(
+        user_id=instance.id
+    ).values_list('key', flat=True))
+    invalidate_user(instance.id, token_keys)
+    transaction.on_commit(lambda: invalidate_user(instance.id, token_keys))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token_snapshot(sender, instance, **kwargs):
+    key = get_token_cache_key(instance.key)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,74 @@
+from base64 import b64encode
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientsList, Recipe, Tag
+
+User = get_user_model()
+
+
+def create_user(name):
+    return User.objects.create_user(
+        username=name,
+        email=f'{name}@example.com',
+        password='Pa55word!',
+        first_name=name,
+        last_name=name,
+    )
+
+
+def create_tags(count):
+    return [
+        Tag.objects.create(name=f'Тег {i}', slug=f'tag{i}', color='#E26C2D')
+        for i in range(count)
+    ]
+
+
+def create_ingredients(count):
+    return [
+        Ingredient.objects.create(name=f'ингредиент {i}', measurement_unit='г')
+        for i in range(count)
+    ]
+
+
+def create_recipe(author, tags=(), ingredients=(), name='Рецепт'):
+    recipe = Recipe.objects.create(
+        author=author,
+        name=name,
+        text='Описание',
+        cooking_time=10,
+        image='static/recipe/test.png',
+    )
+    recipe.tags.set(tags)
+    IngredientsList.objects.bulk_create(
+        IngredientsList(recipe=recipe, ingredient=ingredient, amount=i + 1)
+        for i, ingredient in enumerate(ingredients)
+    )
+    return recipe
+
+
+def get_client(user=None):
+    client = APIClient()
+    if user is not None:
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+def image_png(size=(8, 8)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def image_base64(size=(8, 8)):
+    return 'data:image/png;base64,' + b64encode(image_png(size)).decode()
+
+
+def image_file(size=(8, 8)):
+    return SimpleUploadedFile('image.png', image_png(size), 'image/png')
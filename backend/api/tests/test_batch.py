@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.tests.factories import (
+    create_ingredients,
+    create_recipe,
+    create_user,
+    get_client,
+)
+from recipes import batch
+from recipes.models import Recipe, ShoppingCart, UserFavourite
+from recipes.shopping_list import find_mismatches
+
+
+class RecipeBatchTest(TestCase):
+    """Пакетные изменения считают только действительно изменённые строки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('buyer')
+        author = create_user('author')
+        ingredients = create_ingredients(3)
+        cls.recipes = [
+            create_recipe(author, ingredients=ingredients, name=f'Рецепт {i}')
+            for i in range(3)
+        ]
+        cls.ids = [recipe.id for recipe in cls.recipes]
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipes[0])
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_counts(self, field, expected):
+        self.assertEqual(
+            list(Recipe.objects.filter(id__in=self.ids).order_by(
+                'id'
+            ).values_list(field, flat=True)),
+            expected,
+        )
+
+    def test_add_existing(self):
+        result = batch.add(ShoppingCart, self.user.id, self.ids)
+        self.assertEqual(result, {
+            'added': self.ids[1:], 'existing': self.ids[:1]
+        })
+        self.assert_counts('in_carts_count', [1, 1, 1])
+        self.assertEqual(find_mismatches(), [])
+        result = batch.add(ShoppingCart, self.user.id, self.ids)
+        self.assertEqual(result, {'added': [], 'existing': self.ids})
+        self.assert_counts('in_carts_count', [1, 1, 1])
+        self.assertEqual(find_mismatches(), [])
+
+    def test_remove_missing(self):
+        result = batch.remove(ShoppingCart, self.user.id, self.ids)
+        self.assertEqual(result, {
+            'removed': self.ids[:1], 'missing': self.ids[1:]
+        })
+        self.assert_counts('in_carts_count', [0, 0, 0])
+        self.assertFalse(ShoppingCart.objects.exists())
+        self.assertEqual(find_mismatches(), [])
+
+    def test_api(self):
+        client = get_client(self.user)
+        response = client.post(
+            '/api/recipes/favorite/', {'recipes': self.ids * 2},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['added'], self.ids)
+        self.assert_counts('favorites_count', [1, 1, 1])
+        response = client.delete(
+            '/api/recipes/favorite/', {'recipes': self.ids[:2]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['removed'], self.ids[:2])
+        self.assert_counts('favorites_count', [0, 0, 1])
+        self.assertEqual(
+            list(UserFavourite.objects.values_list('recipe_id', flat=True)),
+            self.ids[2:],
+        )
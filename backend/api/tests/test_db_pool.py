@@ -0,0 +1,26 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase
+
+from foodgram.postgresql.base import DatabaseWrapper
+
+
+class ConnectionPoolSettingsTest(SimpleTestCase):
+    """Пул соединений не сочетается с постоянными соединениями."""
+
+    def get_pool(self, **settings):
+        wrapper = DatabaseWrapper(
+            {**connection.settings_dict, **settings}, 'pool_settings'
+        )
+        try:
+            return wrapper.pool
+        finally:
+            DatabaseWrapper.pools.pop('pool_settings', None)
+
+    def test_conn_max_age_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.get_pool(POOL_SIZE=2, CONN_MAX_AGE=60)
+
+    def test_pool(self):
+        self.assertIsNotNone(self.get_pool(POOL_SIZE=2, CONN_MAX_AGE=0))
+        self.assertIsNone(self.get_pool(POOL_SIZE=0, CONN_MAX_AGE=60))
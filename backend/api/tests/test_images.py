@@ -0,0 +1,103 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from api.tests.factories import (
+    create_ingredients,
+    create_tags,
+    create_user,
+    get_client,
+    image_base64,
+)
+from recipes.images import SOURCE_KEY, process_recipe_image
+from recipes.models import Recipe
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RecipeImageTest(TestCase):
+    """Ограничения загрузки и перекодирование исходного изображения."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.tag = create_tags(1)[0]
+        cls.ingredient = create_ingredients(1)[0]
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, image):
+        return get_client(self.author).post('/api/recipes/', {
+            'name': 'Рецепт',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': image,
+            'tags': [self.tag.id],
+            'ingredients': [{'id': self.ingredient.id, 'amount': 1}],
+        }, format='json')
+
+    def test_upload_limits(self):
+        with mock.patch('api.serializers.fields.RECIPE_IMAGE_MAX_SIZE', 64):
+            response = self.post(image_base64((64, 64)))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.data)
+        with mock.patch(
+            'api.serializers.fields.RECIPE_IMAGE_MAX_PIXELS', 63 * 64
+        ):
+            response = self.post(image_base64((64, 64)))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.data)
+        response = self.post(image_base64((64, 64)))
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_original_reencoded(self):
+        buffer = BytesIO()
+        Image.new('RGB', (400, 200), 'orange').save(buffer, 'PNG')
+        source = default_storage.save(
+            'static/recipe/upload.png', ContentFile(buffer.getvalue())
+        )
+        recipe = Recipe.objects.create(
+            author=self.author, name='Рецепт', text='Описание',
+            cooking_time=10, image=source,
+        )
+        with mock.patch(
+            'recipes.images.RECIPE_IMAGE_ORIGINAL_SIZE', (100, 100)
+        ):
+            process_recipe_image(recipe.id)
+        recipe.refresh_from_db()
+        self.assertNotEqual(recipe.image.name, source)
+        self.assertTrue(recipe.image.name.endswith('.jpg'))
+        self.assertEqual(recipe.image_variants[SOURCE_KEY], recipe.image.name)
+        self.assertFalse(default_storage.exists(source))
+        with recipe.image.open('rb') as file:
+            image = Image.open(file)
+            self.assertEqual((image.format, image.size), ('JPEG', (100, 50)))
+        for path in recipe.image_variants.values():
+            self.assertTrue(default_storage.exists(path))
+        # Файл другого рецепта с тем же изображением остаётся на месте.
+        shared = Recipe.objects.create(
+            author=self.author, name='Копия', text='Описание',
+            cooking_time=10, image=recipe.image.name,
+        )
+        Recipe.objects.filter(id=recipe.id).update(image_variants={})
+        process_recipe_image(recipe.id)
+        self.assertTrue(default_storage.exists(shared.image.name))
+        recipe.refresh_from_db()
+        # Повторная обработка ничего не меняет.
+        process_recipe_image(recipe.id)
+        self.assertEqual(
+            Recipe.objects.get(id=recipe.id).image.name, recipe.image.name
+        )
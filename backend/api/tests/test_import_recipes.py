@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from api.tests.factories import create_ingredients, create_tags, create_user
+from recipes.models import Recipe, RecipeRanking
+
+
+class ImportRecipesTest(TestCase):
+    """import_recipes проверяет строки и делает то же, что сигналы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.tag = create_tags(1)[0]
+        cls.ingredient = create_ingredients(1)[0]
+
+    def row(self, **changes):
+        data = {
+            'name': 'Импорт',
+            'author': self.author.email,
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': 'static/recipe/import.png',
+            'pub_date': '2023-01-01T00:00:00+00:00',
+            'tags': [self.tag.slug],
+            'ingredients': [{
+                'name': self.ingredient.name,
+                'measurement_unit': self.ingredient.measurement_unit,
+                'amount': 5,
+            }],
+        }
+        data.update(changes)
+        return json.dumps(data, ensure_ascii=False)
+
+    def import_lines(self, lines):
+        file = tempfile.NamedTemporaryFile(
+            'w', suffix='.ndjson', encoding='UTF-8', delete=False
+        )
+        self.addCleanup(os.remove, file.name)
+        with file:
+            file.write('\n'.join(lines))
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_recipes', file.name,
+                     stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_invalid_rows_reported(self):
+        path = 'recipes.management.commands.import_recipes.'
+        with mock.patch(path + 'schedule_recipe_image') as schedule:
+            stdout, stderr = self.import_lines([
+                self.row(),
+                self.row(name='Быстро', cooking_time=0),
+                self.row(name='Без тега', tags=['missing']),
+                self.row(name='Много', ingredients=[{
+                    'name': self.ingredient.name,
+                    'measurement_unit': self.ingredient.measurement_unit,
+                    'amount': 0,
+                }]),
+                '{',
+            ])
+        self.assertIn('Загружено рецептов: 1,', stdout)
+        self.assertIn('с ошибками: 4,', stdout)
+        for number in range(2, 6):
+            self.assertIn(f'Строка {number}:', stderr)
+        recipe = Recipe.objects.get()
+        self.assertEqual(recipe.name, 'Импорт')
+        self.assertTrue(RecipeRanking.objects.filter(recipe=recipe).exists())
+        schedule.assert_called_once_with(recipe.pk)
@@ -0,0 +1,53 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.tests.factories import get_client
+from recipes.models import Ingredient
+
+
+class IngredientSearchTest(TestCase):
+    """Поиск ингредиентов: сначала по началу названия, без учёта регистра."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('Фасоль', 'Сахар', 'Соль крупная', 'Морская соль',
+                     'Соль'):
+            Ingredient.objects.create(name=name, measurement_unit='г')
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, **params):
+        response = get_client().get('/api/ingredients/', params)
+        self.assertEqual(response.status_code, 200)
+        return [item['name'] for item in response.json()]
+
+    def test_prefix_first(self):
+        for backend in ('database', 'memory'):
+            with self.subTest(backend=backend), mock.patch(
+                'api.filters.INGREDIENT_SEARCH_BACKEND', backend
+            ):
+                cache.clear()
+                self.assertEqual(
+                    self.search(name='соль'),
+                    ['Соль', 'Соль крупная', 'Морская соль', 'Фасоль'],
+                )
+
+    def test_case_insensitive(self):
+        for value in ('СОЛЬ', 'сОлЬ', 'Соль'):
+            with self.subTest(value=value):
+                self.assertEqual(len(self.search(name=value)), 4)
+        self.assertEqual(self.search(name='САХ'), ['Сахар'])
+
+    def test_limit(self):
+        self.assertEqual(
+            self.search(name='соль', limit=3),
+            ['Соль', 'Соль крупная', 'Морская соль'],
+        )
+        self.assertEqual(self.search(name='соль', limit=1), ['Соль'])
+        with mock.patch('api.filters.INGREDIENT_SEARCH_MAX_LIMIT', 2):
+            self.assertEqual(
+                self.search(name='соль', limit=50), ['Соль', 'Соль крупная']
+            )
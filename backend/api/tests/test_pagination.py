@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from api.tests.factories import create_recipe, create_user, get_client
+from recipes.models import Recipe
+
+
+class KeysetPaginationTest(TestCase):
+    """Обход всех страниц по курсору даёт весь список без пропусков."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        now = timezone.now().replace(microsecond=0)
+        for i in range(40):
+            recipe = create_recipe(author, name=f'Рецепт {i}')
+            # Несколько записей в одной миллисекунде и одинаковые даты.
+            Recipe.objects.filter(id=recipe.id).update(
+                pub_date=now + timedelta(microseconds=(i // 2) * 100)
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, params):
+        client = get_client()
+        ids = []
+        response = client.get('/api/recipes/', params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids += [recipe['id'] for recipe in response.data['results']]
+            if response.data['next'] is None:
+                return ids
+            response = client.get(response.data['next'])
+
+    def test_walk_all_pages(self):
+        expected = list(
+            Recipe.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+        for limit in (1, 3, 7):
+            with self.subTest(limit=limit):
+                ids = self.walk({'pagination': 'cursor', 'limit': limit})
+                self.assertEqual(ids, expected)
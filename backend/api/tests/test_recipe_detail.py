@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.tests.factories import create_recipe, create_user, get_client
+
+User = get_user_model()
+
+
+class RecipeConditionalGetTest(TestCase):
+    """Условный GET рецепта по ETag."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.recipe = create_recipe(cls.author)
+        cls.url = f'/api/recipes/{cls.recipe.id}/'
+
+    def setUp(self):
+        cache.clear()
+
+    def test_not_modified(self):
+        client = get_client()
+        response = client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+        response = client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_author_change(self):
+        # Рецепт не меняется, а автор в ответе - да.
+        client = get_client()
+        etag = client.get(self.url)['ETag']
+        User.objects.filter(id=self.author.id).update(first_name='Новое')
+        response = client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['author']['first_name'], 'Новое')
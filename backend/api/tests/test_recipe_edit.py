@@ -0,0 +1,248 @@
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.factories import (
+    create_ingredients,
+    create_recipe,
+    create_tags,
+    create_user,
+    get_client,
+    image_base64,
+    image_file,
+)
+from api.serializers.fields import Base64OrFileImageField
+from recipes.models import IngredientsList, Recipe
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+class RecipeEditTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.tags = create_tags(3)
+        cls.ingredients = create_ingredients(40)
+        cls.recipe = create_recipe(
+            cls.author, cls.tags[:2], cls.ingredients[:3]
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = get_client(self.author)
+
+    def patch(self, data):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(
+                f'/api/recipes/{self.recipe.id}/', data, format='json'
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        return [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].lstrip().upper().startswith(WRITES)
+        ]
+
+    def current_state(self):
+        return {
+            'tags': [tag.id for tag in self.tags[:2]],
+            'ingredients': [
+                {'id': item.ingredient_id, 'amount': item.amount}
+                for item in IngredientsList.objects.filter(
+                    recipe=self.recipe
+                ).order_by('id')
+            ],
+        }
+
+
+class RecipeUpdateWritesTest(RecipeEditTestCase):
+    """PATCH пишет в базу только то, что изменилось."""
+
+    def test_noop(self):
+        writes = self.patch(self.current_state())
+        # Остаётся только UPDATE строки рецепта из ModelSerializer.
+        self.assertEqual(len(writes), 1)
+        self.assertIn('recipes_recipe', writes[0])
+
+    def test_name_only(self):
+        writes = self.patch({'name': 'Новое название'})
+        self.assertEqual(len(writes), 1)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.name, 'Новое название')
+
+    def test_one_amount(self):
+        data = self.current_state()
+        data['ingredients'][0]['amount'] += 5
+        writes = self.patch(data)
+        # Строка рецепта и одна строка ингредиента.
+        self.assertEqual(len(writes), 2)
+        self.assertEqual(
+            sum('recipes_ingredientslist' in sql for sql in writes), 1
+        )
+
+    def test_one_tag(self):
+        data = self.current_state()
+        data['tags'].append(self.tags[2].id)
+        writes = self.patch(data)
+        self.assertEqual(len(writes), 2)
+        self.assertEqual(
+            set(self.recipe.tags.values_list('id', flat=True)),
+            {tag.id for tag in self.tags},
+        )
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RecipeIngredientsQueriesTest(RecipeEditTestCase):
+    """Ингредиенты проверяются одним запросом при любом их числе."""
+
+    def payload(self, count):
+        return {
+            'name': f'{count} ингредиентов',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': image_base64(),
+            'tags': [self.tags[0].id],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 1}
+                for ingredient in self.ingredients[:count]
+            ],
+        }
+
+    def count_queries(self, method, url, data, status):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertEqual(response.status_code, status, response.data)
+        return len(context.captured_queries)
+
+    def test_create(self):
+        counts = [
+            self.count_queries(
+                'post', '/api/recipes/', self.payload(count), 201
+            )
+            for count in (3, 30)
+        ]
+        self.assertEqual(counts[0], counts[1])
+
+    def test_update(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        counts = []
+        for count in (3, 30):
+            # Теги и состав рецепта каждый раз заменяются целиком.
+            self.recipe.tags.set(self.tags[1:])
+            IngredientsList.objects.filter(recipe=self.recipe).delete()
+            counts.append(
+                self.count_queries('patch', url, self.payload(count), 200)
+            )
+        self.assertEqual(counts[0], counts[1])
+
+    def test_unknown_and_duplicate_ids(self):
+        data = self.payload(2)
+        first = self.ingredients[0].id
+        data['ingredients'] += [
+            {'id': first, 'amount': 2},
+            {'id': 10 ** 6, 'amount': 1},
+        ]
+        data['tags'] = [self.tags[0].id, self.tags[0].id, 10 ** 6]
+        response = self.client.post('/api/recipes/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        for field, duplicate in (('ingredients', first),
+                                 ('tags', self.tags[0].id)):
+            errors = ' '.join(map(str, response.data[field]))
+            with self.subTest(field=field):
+                self.assertIn(f'не найдены: {10 ** 6}.', errors)
+                self.assertIn(f'повторяются: {duplicate}.', errors)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RecipeMultipartTest(RecipeEditTestCase):
+    """Создание и изменение рецепта через multipart/form-data."""
+
+    def payload(self, **changes):
+        data = {
+            'name': 'Из формы',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': image_file(),
+            'tags': [tag.id for tag in self.tags[:2]],
+            'ingredients': json.dumps([
+                {'id': ingredient.id, 'amount': 2}
+                for ingredient in self.ingredients[:2]
+            ]),
+        }
+        data.update(changes)
+        return data
+
+    def send(self, method, url, data):
+        with mock.patch.object(
+            Base64OrFileImageField,
+            'to_internal_value',
+            autospec=True,
+            side_effect=Base64OrFileImageField.to_internal_value,
+        ) as to_internal_value:
+            response = getattr(self.client, method)(
+                url, data, format='multipart'
+            )
+        if 'image' in data:
+            # Файл записан обработчиком загрузки на диск, а не в память.
+            self.assertIsInstance(
+                to_internal_value.call_args[0][1], TemporaryUploadedFile
+            )
+        return response
+
+    def test_create(self):
+        response = self.send('post', '/api/recipes/', self.payload())
+        self.assertEqual(response.status_code, 201, response.data)
+        recipe = Recipe.objects.get(id=response.data['id'])
+        self.assertEqual(
+            set(recipe.tags.values_list('id', flat=True)),
+            {tag.id for tag in self.tags[:2]},
+        )
+        self.assertEqual(
+            sorted(IngredientsList.objects.filter(
+                recipe=recipe
+            ).values_list('ingredient_id', 'amount')),
+            [(ingredient.id, 2) for ingredient in self.ingredients[:2]],
+        )
+        self.assertTrue(recipe.image.storage.exists(recipe.image.name))
+
+    def test_patch_image_and_json_tags(self):
+        old_image = self.recipe.image.name
+        response = self.send('patch', f'/api/recipes/{self.recipe.id}/', {
+            'image': image_file((16, 16)),
+            'tags': json.dumps([self.tags[2].id]),
+        })
+        self.assertEqual(response.status_code, 200, response.data)
+        self.recipe.refresh_from_db()
+        self.assertNotEqual(self.recipe.image.name, old_image)
+        self.assertEqual(
+            list(self.recipe.tags.values_list('id', flat=True)),
+            [self.tags[2].id],
+        )
+
+    def test_malformed(self):
+        response = self.client.post(
+            '/api/recipes/',
+            self.payload(ingredients='[{"id": 1,'),
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ingredients', response.data)
+        response = self.client.generic(
+            'POST',
+            '/api/recipes/',
+            b'--broken\r\nContent-Disposition: form-data',
+            content_type='multipart/form-data',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Recipe.objects.exclude(id=self.recipe.id).exists())
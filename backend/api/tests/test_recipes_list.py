@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.tests.factories import (
+    create_ingredients,
+    create_recipe,
+    create_tags,
+    create_user,
+    get_client,
+)
+from recipes.models import ShoppingCart, UserFavourite
+from users.models import Subscribe
+
+
+class RecipeListQueriesTest(TestCase):
+    """Число запросов /api/recipes/ не зависит от размера страницы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        authors = [create_user(f'author{i}') for i in range(3)]
+        tags = create_tags(3)
+        ingredients = create_ingredients(5)
+        for i in range(12):
+            recipe = create_recipe(
+                authors[i % 3], tags[:2], ingredients[:3], f'Рецепт {i}'
+            )
+            if i % 2:
+                UserFavourite.objects.create(user=cls.user, recipe=recipe)
+            if i % 3:
+                ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        Subscribe.objects.create(subscriber=cls.user, author=authors[0])
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_list_queries(self, client, queries):
+        for limit in (2, 10):
+            with self.subTest(limit=limit), self.assertNumQueries(queries):
+                response = client.get('/api/recipes/', {'limit': limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), limit)
+
+    def test_anonymous(self):
+        # COUNT, страница рецептов с авторами, теги, ингредиенты.
+        self.assert_list_queries(get_client(), 4)
+
+    def test_authenticated(self):
+        # Плюс токен с пользователем и множество подписок пользователя.
+        self.assert_list_queries(get_client(self.user), 6)
+
+    def test_flags(self):
+        response = get_client(self.user).get('/api/recipes/', {'limit': 12})
+        recipes = {
+            recipe['name']: recipe for recipe in response.data['results']
+        }
+        self.assertTrue(recipes['Рецепт 1']['is_favorited'])
+        self.assertFalse(recipes['Рецепт 2']['is_favorited'])
+        self.assertTrue(recipes['Рецепт 2']['is_in_shopping_cart'])
+        self.assertFalse(recipes['Рецепт 3']['is_in_shopping_cart'])
+        self.assertTrue(recipes['Рецепт 3']['author']['is_subscribed'])
+        self.assertFalse(recipes['Рецепт 4']['author']['is_subscribed'])
@@ -0,0 +1,85 @@
+import warnings
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.test import TestCase
+
+from api import cache as api_cache
+from api.cache import get_table_version
+from api.tests.factories import create_ingredients, create_tags, get_client
+from recipes.models import Ingredient, Tag
+
+
+class ReferenceCacheTest(TestCase):
+    """Кэш ответов справочников: ключи и версии таблиц."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_tags(2)
+        create_ingredients(3)
+        # Список ингредиентов длиннее COMPRESSION_MIN_SIZE.
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'длинное название {i:03d}', measurement_unit='г')
+            for i in range(40)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_long_query(self):
+        # Ключ длиннее 250 байт memcached отверг бы, остальные бэкенды
+        # только предупреждают.
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            response = get_client().get(
+                '/api/ingredients/', {'name': 'ингредиент' * 40}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    def test_version_bumped_on_commit(self):
+        version = get_table_version(Tag)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Tag.objects.create(name='Новый', slug='new', color='#000000')
+            self.assertEqual(get_table_version(Tag), version)
+        self.assertEqual(len(callbacks), 1)
+        self.assertGreater(get_table_version(Tag), version)
+
+    def test_list_reflects_changes(self):
+        client = get_client()
+        self.assertEqual(len(client.get('/api/ingredients/').json()), 43)
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.filter(name='ингредиент 0').first().delete()
+        self.assertEqual(len(client.get('/api/ingredients/').json()), 42)
+
+    def test_not_modified(self):
+        client = get_client()
+        for url in ('/api/tags/', '/api/ingredients/'):
+            for encoding in ('', 'gzip'):
+                with self.subTest(url=url, encoding=encoding):
+                    response = client.get(
+                        url, HTTP_ACCEPT_ENCODING=encoding
+                    )
+                    self.assertEqual(response.status_code, 200)
+                    etag = response['ETag']
+                    response = client.get(
+                        url,
+                        HTTP_ACCEPT_ENCODING=encoding,
+                        HTTP_IF_NONE_MATCH=etag,
+                    )
+                    self.assertEqual(response.status_code, 304)
+                    self.assertEqual(response['ETag'], etag)
+
+    def test_compressed_variant_cached(self):
+        client = get_client()
+        with mock.patch.object(
+            api_cache, 'compress', wraps=api_cache.compress
+        ) as compress:
+            for _ in range(3):
+                response = client.get(
+                    '/api/ingredients/', HTTP_ACCEPT_ENCODING='gzip'
+                )
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+                self.assertTrue(response['ETag'].startswith('W/'))
+        compress.assert_called_once()
@@ -0,0 +1,128 @@
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+
+from api.cache import bump_table_version
+from api.matching import RecipeMatcher
+from api.search import recipe_index
+from api.tests.factories import (
+    create_ingredients,
+    create_recipe,
+    create_user,
+    get_client,
+)
+from recipes.models import Ingredient, IngredientsList, Recipe
+
+
+class RecipeSearchTest(TestCase):
+    """Поиск рецептов на PostgreSQL (tsvector) и SQLite (индекс в памяти)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, value, **params):
+        response = get_client().get(
+            '/api/recipes/', {'search': value, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_all_matches_counted(self):
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=self.author,
+                name=f'Борщ {i}',
+                text='Свекла' if i % 2 else 'Капуста',
+                cooking_time=10,
+                image='static/recipe/test.png',
+            )
+            for i in range(320)
+        )
+        # bulk_create без сигналов, а на SQLite ответ идёт из индекса.
+        bump_table_version(Recipe)
+        recipe_index.refresh(wait=True)
+        data = self.search('борщ', limit=50)
+        self.assertEqual(data['count'], 320)
+        ids = set()
+        for page in range(1, 8):
+            ids |= {
+                recipe['id']
+                for recipe in self.search(
+                    'борщ', limit=50, page=page
+                )['results']
+            }
+        self.assertEqual(len(ids), 320)
+        data = self.search('борщ свекла', limit=1)
+        self.assertEqual(data['count'], 160)
+        self.assertEqual(data['results'][0]['text'], 'Свекла')
+
+    @skipUnless(
+        connection.vendor == 'postgresql', 'триггеры миграции recipes 0014'
+    )
+    def test_search_vector_triggers(self):
+        recipe = create_recipe(self.author, name='Суп')
+        ingredient = create_ingredients(1)[0]
+
+        def found(value):
+            return [item['id'] for item in self.search(value)['results']]
+
+        self.assertEqual(found('суп'), [recipe.id])
+        IngredientsList.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=1
+        )
+        self.assertEqual(found('ингредиент'), [recipe.id])
+        Ingredient.objects.filter(id=ingredient.id).update(name='фасоль')
+        self.assertEqual(found('фасоль'), [recipe.id])
+        self.assertEqual(found('ингредиент'), [])
+        IngredientsList.objects.filter(recipe=recipe).delete()
+        self.assertEqual(found('фасоль'), [])
+        Recipe.objects.filter(id=recipe.id).update(name='Рагу')
+        self.assertEqual(found('рагу'), [recipe.id])
+        self.assertEqual(found('суп'), [])
+
+
+class IndexRefreshTest(TestCase):
+    """Пока индекс перестраивается в фоне, запросы получают прежний."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.ingredients = create_ingredients(3)
+        cls.recipe = create_recipe(
+            cls.author, ingredients=cls.ingredients[:2]
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_stale_index_served_during_rebuild(self):
+        matcher = RecipeMatcher()
+        matcher.refresh()
+        IngredientsList.objects.create(
+            recipe=self.recipe, ingredient=self.ingredients[2], amount=1
+        )
+        bump_table_version(Recipe)
+        executor = mock.Mock()
+        # Вне транзакции теста, как в запросе без ATOMIC_REQUESTS.
+        connections = mock.MagicMock()
+        connections.__getitem__.return_value.in_atomic_block = False
+        query = [ingredient.id for ingredient in self.ingredients]
+        with mock.patch.multiple(
+            'api.indexes',
+            get_executor=mock.Mock(return_value=executor),
+            connections=connections,
+        ):
+            for _ in range(2):
+                self.assertEqual(matcher.match(query, 1)[0][1], 2)
+            executor.submit.assert_called_once()
+            job, version = executor.submit.call_args[0]
+            job(version)
+            self.assertEqual(matcher.match(query, 1)[0][1], 3)
+            executor.submit.assert_called_once()
+        self.assertFalse(matcher.lock.locked())
@@ -0,0 +1,172 @@
+import os
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import Client, TestCase
+
+from api.cache import get_table_version
+from api.exporters import PdfShoppingCartRenderer, get_renderers
+from api.tests.factories import (
+    create_ingredients,
+    create_recipe,
+    create_tags,
+    create_user,
+    get_client,
+)
+from recipes.models import (
+    IngredientsList,
+    Recipe,
+    ShoppingCart,
+    ShoppingListItem,
+)
+from foodgram.settings import SHOPPING_CART_PDF_FONT
+from recipes.shopping_list import find_mismatches
+
+
+class ShoppingListConsistencyTest(TestCase):
+    """Приращения списка покупок совпадают с пересчётом по корзинам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.users = [create_user(f'buyer{i}') for i in range(2)]
+        cls.tags = create_tags(1)
+        cls.ingredients = create_ingredients(4)
+        # Общие ингредиенты, чтобы суммы складывались из нескольких рецептов.
+        cls.recipes = [
+            create_recipe(cls.author, cls.tags, cls.ingredients[i:i + 3],
+                          f'Рецепт {i}')
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_consistent(self):
+        self.assertEqual(find_mismatches(), [])
+
+    def fill_carts(self):
+        for user in self.users:
+            client = get_client(user)
+            for recipe in self.recipes:
+                response = client.post(
+                    f'/api/recipes/{recipe.id}/shopping_cart/'
+                )
+                self.assertEqual(response.status_code, 201)
+        self.assertTrue(ShoppingListItem.objects.exists())
+        self.assert_consistent()
+
+    def test_cart_add_and_remove(self):
+        self.fill_carts()
+        client = get_client(self.users[0])
+        for recipe in self.recipes:
+            response = client.delete(
+                f'/api/recipes/{recipe.id}/shopping_cart/'
+            )
+            self.assertEqual(response.status_code, 204)
+            self.assert_consistent()
+        self.assertFalse(
+            ShoppingListItem.objects.filter(user=self.users[0]).exists()
+        )
+
+    def test_recipe_edit(self):
+        self.fill_carts()
+        recipe = self.recipes[0]
+        items = IngredientsList.objects.filter(recipe=recipe).order_by('id')
+        ingredients = [
+            {'id': item.ingredient_id, 'amount': item.amount + 10}
+            for item in items[1:]
+        ] + [{'id': self.ingredients[3].id, 'amount': 7}]
+        response = get_client(self.author).patch(
+            f'/api/recipes/{recipe.id}/',
+            {'tags': [self.tags[0].id], 'ingredients': ingredients},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assert_consistent()
+
+    def test_recipe_delete(self):
+        self.fill_carts()
+        response = get_client(self.author).delete(
+            f'/api/recipes/{self.recipes[0].id}/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(
+            ShoppingCart.objects.filter(recipe=self.recipes[0]).exists()
+        )
+        self.assert_consistent()
+
+    def test_admin_rebuild(self):
+        self.fill_carts()
+        admin = create_user('admin')
+        admin.is_staff = admin.is_superuser = True
+        admin.save()
+        client = Client()
+        client.force_login(admin)
+        item = IngredientsList.objects.filter(recipe=self.recipes[0]).first()
+        version = get_table_version(Recipe)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                f'/admin/recipes/ingredientslist/{item.id}/change/',
+                {
+                    'recipe': item.recipe_id,
+                    'ingredient': item.ingredient_id,
+                    'amount': item.amount + 100,
+                },
+            )
+        self.assertEqual(response.status_code, 302)
+        # Индексы рецептов в памяти перестраиваются по версии таблицы.
+        self.assertNotEqual(get_table_version(Recipe), version)
+        item.refresh_from_db()
+        self.assertEqual(item.amount, 101)
+        self.assert_consistent()
+        response = client.post(
+            f'/admin/recipes/ingredientslist/{item.id}/delete/',
+            {'post': 'yes'},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assert_consistent()
+
+
+class ShoppingCartDownloadTest(TestCase):
+    """Выгрузка списка покупок в доступных форматах."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('buyer')
+        recipe = create_recipe(
+            cls.user, create_tags(1), create_ingredients(2)
+        )
+        ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        cache.clear()
+        self.client = get_client(self.user)
+
+    def download(self, file_type):
+        return self.client.get(
+            '/api/recipes/download_shopping_cart/', {'file_type': file_type}
+        )
+
+    def test_txt(self):
+        response = self.download('txt')
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('ингредиент 0 - 1, г', content)
+
+    @skipUnless(os.path.exists(SHOPPING_CART_PDF_FONT), 'нет шрифта PDF')
+    def test_pdf(self):
+        response = self.download('pdf')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(
+            b'%PDF'
+        ))
+
+    def test_pdf_without_font(self):
+        with mock.patch(
+            'api.exporters.SHOPPING_CART_PDF_FONT', '/nonexistent.ttf'
+        ), self.assertLogs('api.exporters', 'WARNING'):
+            self.assertNotIn('pdf', get_renderers())
+            with self.assertRaises(ImproperlyConfigured):
+                PdfShoppingCartRenderer().get_font()
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from api.tests.factories import create_recipe, create_user, get_client
+from recipes.models import Recipe
+from users.models import Subscribe
+
+
+class SubscriptionsQueriesTest(TestCase):
+    """Лента подписок: число запросов не зависит от числа авторов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.authors = [create_user(f'author{i}') for i in range(8)]
+        now = timezone.now()
+        for author in cls.authors:
+            Subscribe.objects.create(subscriber=cls.user, author=author)
+            for i in range(5):
+                recipe = create_recipe(author, name=f'{author.username} {i}')
+                Recipe.objects.filter(id=recipe.id).update(
+                    pub_date=now - timedelta(days=5 - i)
+                )
+
+    def setUp(self):
+        cache.clear()
+        self.client = get_client(self.user)
+
+    def assert_constant_queries(self, queries, **params):
+        for limit in (2, 8):
+            with self.subTest(limit=limit), self.assertNumQueries(queries):
+                response = self.client.get(
+                    '/api/users/subscriptions/', {'limit': limit, **params}
+                )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), limit)
+        return response.data['results']
+
+    def test_all_recipes(self):
+        # Токен с пользователем, COUNT, страница авторов, рецепты всех
+        # авторов страницы.
+        results = self.assert_constant_queries(4)
+        for author in results:
+            self.assertEqual(len(author['recipes']), 5)
+            self.assertEqual(author['recipes_count'], 5)
+
+    def test_recipes_limit(self):
+        results = self.assert_constant_queries(4, recipes_limit=3)
+        for author in results:
+            self.assertEqual(
+                [recipe['name'] for recipe in author['recipes']],
+                [f'{author["username"]} {i}' for i in (4, 3, 2)],
+            )
+            self.assertEqual(author['recipes_count'], 5)
@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+
+from api.authentication import (
+    CachedTokenAuthentication,
+    get_token_cache_key,
+)
+from api.tests.factories import create_recipe, create_user, get_client
+from api.views.user_views import UsersViewSet
+
+
+class MeUpdateTest(TestCase):
+    """Правка профиля не затирает поля устаревшим снимком пользователя."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user('author')
+
+    def test_patch_keeps_recipes_count(self):
+        client = get_client(self.user)
+        with mock.patch.object(
+            UsersViewSet,
+            'authentication_classes',
+            [CachedTokenAuthentication],
+        ):
+            # Снимок пользователя попадает в кэш до создания рецепта.
+            self.assertEqual(client.get('/api/users/me/').status_code, 200)
+            create_recipe(self.user)
+            response = client.patch(
+                '/api/users/me/', {'first_name': 'Новое'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Новое')
+        self.assertEqual(self.user.recipes_count, 1)
+
+
+class UserSnapshotInvalidationTest(TestCase):
+    """Снимок пользователя в кэше сбрасывается и после фиксации."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user('reader')
+
+    def test_deactivation_in_atomic(self):
+        client = get_client(self.user)
+        key = get_token_cache_key(Token.objects.get(user=self.user).key)
+        with mock.patch.object(
+            UsersViewSet,
+            'authentication_classes',
+            [CachedTokenAuthentication],
+        ):
+            self.assertEqual(client.get('/api/users/me/').status_code, 200)
+            stale = cache.get(key)
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    self.user.is_active = False
+                    self.user.save()
+                    # Запрос из другого соединения до фиксации читает
+                    # старую строку и снова кэширует её.
+                    cache.set(key, stale)
+            response = client.get('/api/users/me/')
+        self.assertEqual(response.status_code, 401)
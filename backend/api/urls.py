@@ -6,11 +6,13 @@ from api.views.user_views import (
     UsersViewSet,
     # set_password
 )
+from api.views.metrics_views import MetricsView
 from api.views.recipes_views import (
     TagsViewSet,
     IngredientsViewSet,
     RecipesViewSet,
 )
+from foodgram.settings import AUTH_JWT_ENABLED
 
 
 app_name = 'api'
@@ -52,4 +54,12 @@ urlpatterns = [
         TokenDestroyView.as_view(),
         name='logout'
     ),
+    path(
+        'internal/metrics/',
+        MetricsView.as_view(),
+        name='metrics'
+    ),
 ]
+
+if AUTH_JWT_ENABLED:
+    urlpatterns.append(path('auth/', include('djoser.urls.jwt')))
@@ -1,8 +1,10 @@
+from hashlib import md5
+
 from django.contrib.auth import get_user_model
-from django.db.models.aggregates import Sum
+from django.db.models import F, Prefetch
 from django.db.models.expressions import Exists, OuterRef, Value
-from django.http.response import HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_vary_headers
 
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
@@ -13,10 +15,14 @@ from rest_framework.permissions import (
     IsAuthenticatedOrReadOnly
 )
 
+from api.cache import VersionedCacheMixin, get_table_version
+from api.exporters import SHOPPING_CART_RENDERERS, stream_shopping_cart
 from api.filters import IngredientFilter, RecipeFilter
+from api.matching import recipe_matcher
 
 from api.permissions import IsAdminOrReadOnly
 
+from recipes import batch
 from recipes.models import (
     Tag,
     Ingredient,
@@ -24,7 +30,9 @@ from recipes.models import (
     IngredientsList,
     UserFavourite,
     ShoppingCart,
+    ShoppingListItem,
 )
+from users.models import Subscribe
 
 from api.serializers.recipes_serializers import (
     TagSerializer,
@@ -33,11 +41,11 @@ from api.serializers.recipes_serializers import (
     RecipeEditSerializer,
     UserFavouriteSerializer,
     ShoppingCartSerializer,
+    RecipeBatchSerializer,
+    RecipeMatchQuerySerializer,
+    RecipeMatchSerializer,
 )
 
-from foodgram.settings import SHOPPING_CART_FILENAME
-
-
 User = get_user_model()
 
 
@@ -47,6 +55,7 @@ class PermissionAndPaginationMixin:
 
 
 class TagsViewSet(
+    VersionedCacheMixin,
     PermissionAndPaginationMixin,
     viewsets.ModelViewSet
 ):
@@ -55,6 +64,7 @@ class TagsViewSet(
 
 
 class IngredientsViewSet(
+    VersionedCacheMixin,
     PermissionAndPaginationMixin,
     viewsets.ModelViewSet
 ):
@@ -74,19 +84,21 @@ class RecipesViewSet(viewsets.ModelViewSet):
         return RecipeEditSerializer
 
     def get_queryset(self):
+        queryset = Recipe.objects.select_related('author').defer(
+            'search_vector'
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe',
+                queryset=IngredientsList.objects.select_related('ingredient')
+            ),
+        )
         if not self.request.user.is_authenticated:
-            return Recipe.objects.annotate(
+            return queryset.annotate(
                 is_in_shopping_cart=Value(False),
                 is_favorited=Value(False),
-            ).select_related('author').prefetch_related(
-                'tags',
-                'author',
-                'ingredients',
-                'recipe',
-                'shopping_cart',
-                'user_favorite'
             )
-        return Recipe.objects.annotate(
+        return queryset.annotate(
             is_favorited=Exists(
                 UserFavourite.objects.filter(
                     user=self.request.user,
@@ -99,15 +111,74 @@ class RecipesViewSet(viewsets.ModelViewSet):
                     recipe=OuterRef('id')
                 )
             )
-        ).select_related('author').prefetch_related(
-            'tags',
-            'author',
-            'ingredients',
-            'recipe',
-            'shopping_cart',
-            'user_favorite'
         )
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        user = self.request.user
+        if (self.request.method in SAFE_METHODS
+                and user.is_authenticated):
+            context['subscriptions'] = set(
+                user.subscriber.values_list('author_id', flat=True)
+            )
+        return context
+
+    def get_etag(self):
+        """ETag ответа retrieve одним запросом.
+
+        Учитывает всё, от чего зависит ответ: дату изменения рецепта,
+        данные автора, отметки текущего пользователя и версии тегов
+        и ингредиентов. Last-Modified не отдаётся: у данных автора
+        и справочников нет даты изменения.
+        """
+        pk = self.kwargs[self.lookup_field]
+        if not pk.isdigit():
+            return None
+        user = self.request.user
+        queryset = Recipe.objects.filter(pk=pk)
+        fields = [
+            'updated_at',
+            'author__email',
+            'author__username',
+            'author__first_name',
+            'author__last_name',
+        ]
+        if user.is_authenticated:
+            queryset = queryset.annotate(
+                is_favorited=Exists(UserFavourite.objects.filter(
+                    user=user, recipe=OuterRef('id')
+                )),
+                is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                    user=user, recipe=OuterRef('id')
+                )),
+                is_subscribed=Exists(Subscribe.objects.filter(
+                    subscriber=user, author=OuterRef('author_id')
+                )),
+            )
+            fields += ['is_favorited', 'is_in_shopping_cart', 'is_subscribed']
+        state = queryset.values_list(*fields).first()
+        if state is None:
+            return None
+        etag = md5(repr((
+            user.id,
+            state,
+            get_table_version(Tag),
+            get_table_version(Ingredient),
+        )).encode()).hexdigest()
+        return f'"{etag}"'
+
+    def retrieve(self, request, *args, **kwargs):
+        """Рецепт с условным GET: 304 без сериализации и prefetch."""
+        etag = self.get_etag()
+        if etag is None:
+            return super().retrieve(request, *args, **kwargs)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
@@ -141,34 +212,93 @@ class RecipesViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED
         )
 
-    @staticmethod
-    def send_message(ingredients):
-        shopping_cart = 'Список покупок:'
-        for ingredient in ingredients:
-            shopping_cart += (
-                f"\n * {ingredient['ingredient__name']} "
-                f"- {ingredient['amount']}"
-                f", {ingredient['ingredient__measurement_unit']}")
-        response = HttpResponse(
-            shopping_cart,
-            content_type='text/plain'
-        )
-        response['Content-Disposition'] = (f'attachment; filename'
-                                           f'="{SHOPPING_CART_FILENAME}"')
-        return response
+    def change_batch(self, request, model):
+        """Пакетное добавление (POST) или удаление (DELETE) рецептов."""
+        serializer = RecipeBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+        if request.method.upper() == 'DELETE':
+            return Response(batch.remove(model, request.user.id, recipe_ids))
+        return Response(batch.add(model, request.user.id, recipe_ids))
+
+    @action(
+        detail=False,
+        methods=('POST', 'DELETE'),
+        url_path='shopping_cart',
+        permission_classes=[IsAuthenticated]
+    )
+    def shopping_cart_batch(self, request):
+        return self.change_batch(request, ShoppingCart)
+
+    @action(
+        detail=False,
+        methods=('POST', 'DELETE'),
+        url_path='favorite',
+        permission_classes=[IsAuthenticated]
+    )
+    def favorite_batch(self, request):
+        return self.change_batch(request, UserFavourite)
 
     @action(
         detail=False,
-        methods=['GET']
+        methods=['GET'],
+        permission_classes=[IsAuthenticated]
     )
     def download_shopping_cart(self, request):
-        ingredients = IngredientsList.objects.filter(
-            recipe__shopping_cart__user=request.user
+        renderer = SHOPPING_CART_RENDERERS.get(
+            request.query_params.get('file_type', 'txt')
+        )
+        if renderer is None:
+            return Response(
+                {'detail': 'Доступные форматы: '
+                           + ', '.join(SHOPPING_CART_RENDERERS)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        ingredients = ShoppingListItem.objects.filter(
+            user=request.user
         ).order_by('ingredient__name').values(
             'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(amount=Sum('amount'))
-        return self.send_message(ingredients)
+            'ingredient__measurement_unit',
+            amount=F('total_amount'),
+        ).iterator()
+        return stream_shopping_cart(ingredients, renderer)
+
+    @action(detail=False, methods=['GET'])
+    def match(self, request):
+        """Рецепты по имеющимся ингредиентам: ?ingredients=1&ingredients=2."""
+        query = RecipeMatchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        matches = recipe_matcher.match(
+            query.validated_data['ingredients'],
+            query.validated_data['limit'],
+            query.validated_data['metric'],
+        )
+        recipes = Recipe.objects.only(
+            'id', 'name', 'image', 'image_variants', 'cooking_time'
+        ).in_bulk([recipe_id for recipe_id, *_ in matches])
+        ingredients = Ingredient.objects.in_bulk({
+            ingredient_id
+            for *_, missing in matches
+            for ingredient_id in missing
+        })
+        result = []
+        for recipe_id, matched, coverage, jaccard, missing in matches:
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                continue
+            recipe.matched = matched
+            recipe.coverage = coverage
+            recipe.jaccard = jaccard
+            recipe.missing = [
+                ingredients[ingredient_id] for ingredient_id in missing
+                if ingredient_id in ingredients
+            ]
+            result.append(recipe)
+        return Response(RecipeMatchSerializer(
+            result,
+            many=True,
+            context={'request': request}
+        ).data)
 
     @action(
         detail=True,
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
+from django.db.models import F, Window
 from django.db.models.expressions import Exists, OuterRef, Value
+from django.db.models.functions import RowNumber
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 
@@ -12,13 +14,15 @@ from rest_framework.permissions import (
     IsAuthenticated,
 )
 
+from recipes.models import Recipe
 from users.models import Subscribe
 
 from api.serializers.user_serializers import (
     UserCreateSerializer,
     UserSerializer,
     UserPasswordSerializer,
-    SubscribeSerializer
+    SubscribeSerializer,
+    get_recipes_limit,
 )
 
 User = get_user_model()
@@ -42,6 +46,14 @@ class UsersViewSet(UserViewSet):
             return UserCreateSerializer
         return UserSerializer
 
+    def get_instance(self):
+        # request.user может быть снимком из кэша аутентификации: перед
+        # записью пользователь читается заново, иначе save() вернул бы
+        # устаревшие значения (например, recipes_count).
+        if self.request.method.upper() == 'GET':
+            return self.request.user
+        return User.objects.get(pk=self.request.user.pk)
+
     def perform_create(self, serializer):
         password = make_password(self.request.data['password'])
         serializer.save(password=password)
@@ -59,7 +71,9 @@ class UsersViewSet(UserViewSet):
         )
         serializer.is_valid(raise_exception=True)
         user.set_password(serializer.validated_data['new_password'])
-        user.save()
+        # request.user может быть снимком из кэша аутентификации,
+        # сохраняется только пароль.
+        user.save(update_fields=('password',))
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -69,8 +83,14 @@ class UsersViewSet(UserViewSet):
         permission_classes=(IsAuthenticated,),
     )
     def subscriptions(self, request):
-        queryset = Subscribe.objects.filter(subscriber_id=request.user.id)
+        queryset = User.objects.filter(
+            subscribing__subscriber=request.user
+        ).annotate(
+            is_subscribed=Value(True),
+            subscription_id=F('subscribing__id'),
+        ).order_by('-subscription_id')
         pages = self.paginate_queryset(queryset)
+        self.attach_recipes(pages, get_recipes_limit(request))
         serializer = SubscribeSerializer(
             pages,
             many=True,
@@ -78,6 +98,35 @@ class UsersViewSet(UserViewSet):
         )
         return self.get_paginated_response(serializer.data)
 
+    @staticmethod
+    def attach_recipes(authors, limit):
+        """Последние рецепты всех авторов страницы одним запросом."""
+        recipes_by_author = {author.id: [] for author in authors}
+        recipes = Recipe.objects.filter(
+            author_id__in=recipes_by_author
+        ).only(
+            'id', 'name', 'image', 'image_variants', 'cooking_time',
+            'author_id',
+        )
+        if limit is not None:
+            sql, params = recipes.annotate(
+                row_number=Window(
+                    expression=RowNumber(),
+                    partition_by=F('author_id'),
+                    order_by=(F('pub_date').desc(), F('id').desc()),
+                )
+            ).query.sql_with_params()
+            recipes = Recipe.objects.raw(
+                f'SELECT * FROM ({sql}) AS ranked '
+                f'WHERE ranked.row_number <= %s '
+                f'ORDER BY ranked.row_number',
+                (*params, limit)
+            )
+        for recipe in recipes:
+            recipes_by_author[recipe.author_id].append(recipe)
+        for author in authors:
+            author.subscription_recipes = recipes_by_author[author.id]
+
     @action(
         detail=True,
         methods=[
@@ -105,12 +154,12 @@ class UsersViewSet(UserViewSet):
                 {'detail': 'Подписка есть или пытайтесь подписаться на себя'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        new_subscribe = Subscribe.objects.create(
+        Subscribe.objects.create(
             subscriber=request.user,
             author=author
         )
         serializer = SubscribeSerializer(
-            new_subscribe,
+            author,
             context={'request': request}
         )
         return Response(
@@ -0,0 +1,152 @@
+from functools import partial
+from threading import BoundedSemaphore, Lock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+Database = base.Database
+
+
+def is_usable(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Database.Error:
+        return False
+    return True
+
+
+class ConnectionPool:
+    """Соединения psycopg2, общие для потоков процесса.
+
+    Открыто не больше size соединений. Поток ждёт свободное соединение
+    до timeout секунд, затем получает OperationalError.
+    """
+
+    def __init__(self, size, timeout):
+        self.slots = BoundedSemaphore(size)
+        self.timeout = timeout
+        self.lock = Lock()
+        self.idle = []
+
+    def get(self, connect, health_check=False):
+        """Свободное соединение или новое из connect().
+
+        С health_check соединение из пула проверяется, нерабочее
+        закрывается и заменяется новым.
+        """
+        if not self.slots.acquire(timeout=self.timeout):
+            raise Database.OperationalError(
+                f'Нет свободных соединений в пуле за {self.timeout} с.'
+            )
+        with self.lock:
+            connection = self.idle.pop() if self.idle else None
+        if connection is not None:
+            if not health_check or is_usable(connection):
+                return connection
+            connection.close()
+        try:
+            return connect()
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def put(self, connection, discard=False):
+        """Возвращает соединение, незавершённая транзакция откатывается."""
+        try:
+            if not discard and not connection.closed:
+                status = connection.info.transaction_status
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    discard = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+        except Database.Error:
+            discard = True
+        try:
+            if discard or connection.closed:
+                connection.close()
+            else:
+                with self.lock:
+                    self.idle.append(connection)
+        finally:
+            self.slots.release()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL с проверкой постоянных соединений и пулом.
+
+    CONN_HEALTH_CHECKS, как в Django 4.1: соединение, оставшееся от
+    прошлого запроса или взятое из пула, проверяется SELECT 1 перед
+    первым запросом к базе и при ошибке открывается заново.
+    POOL_SIZE > 0: соединения берутся из пула, общего для потоков
+    процесса, и при закрытии возвращаются в него. Вместе с
+    CONN_MAX_AGE > 0 поток держал бы слот пула между запросами, поэтому
+    такое сочетание, как и в Django 5.1, считается ошибкой настройки.
+    """
+    pools = {}
+    pools_lock = Lock()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    @property
+    def pool(self):
+        size = self.settings_dict.get('POOL_SIZE')
+        if not size:
+            return None
+        if self.settings_dict.get('CONN_MAX_AGE'):
+            raise ImproperlyConfigured(
+                'POOL_SIZE > 0 несовместим с постоянными соединениями: '
+                'укажите CONN_MAX_AGE = 0.'
+            )
+        with self.pools_lock:
+            if self.alias not in self.pools:
+                self.pools[self.alias] = ConnectionPool(
+                    size, self.settings_dict.get('POOL_TIMEOUT', 10)
+                )
+            return self.pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        return pool.get(
+            partial(super().get_new_connection, conn_params),
+            health_check=self.settings_dict.get('CONN_HEALTH_CHECKS'),
+        )
+
+    def _close(self):
+        pool = self.pool
+        if pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # Django оставляет ссылку на соединение, закрытое внутри
+            # atomic(), поэтому в пул оно не возвращается.
+            return pool.put(self.connection, discard=self.in_atomic_block)
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        # Вызывается сигналами в начале и в конце каждого запроса.
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        if (
+            self.connection is None
+            or self.health_check_done
+            or not self.settings_dict.get('CONN_HEALTH_CHECKS')
+            or self.in_atomic_block
+        ):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
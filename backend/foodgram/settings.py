@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+from datetime import timedelta
 
 from dotenv import load_dotenv
 
@@ -57,6 +58,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -90,14 +93,44 @@ WSGI_APPLICATION = 'foodgram.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# foodgram.postgresql добавляет к стандартному бэкенду проверку
+# соединений (CONN_HEALTH_CHECKS) и пул на процесс (POOL_SIZE > 0).
+DB_ENGINE = os.getenv('DB_ENGINE', 'django.db.backends.postgresql')
+
+if DB_ENGINE == 'django.db.backends.postgresql':
+    DB_ENGINE = 'foodgram.postgresql'
+
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 0))
+
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.postgresql'),
+        'ENGINE': DB_ENGINE,
         'NAME': os.getenv('DB_NAME'),
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        # С пулом соединение возвращается в него после каждого запроса.
+        'CONN_MAX_AGE': int(
+            os.getenv('DB_CONN_MAX_AGE', 0 if DB_POOL_SIZE else 60)
+        ),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', 'True'
+        ) == 'True',
+        'POOL_SIZE': DB_POOL_SIZE,
+        'POOL_TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+        # Ранние миграции не применяются к SQLite (RenameField при
+        # UniqueConstraint), тестовая база SQLite строится по моделям.
+        'TEST': {'MIGRATE': DB_ENGINE != 'django.db.backends.sqlite3'},
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
@@ -167,21 +200,150 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загружаемые файлы пишутся во временный файл по частям, а не в память.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
 AUTH_USER_MODEL = 'users.User'
 
 ERR_AUTH_MSG = 'Не удается войти с такими учетными данными.'
 
 CUSTOM_PAGE_SIZE = 6
 
+REFERENCE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Метрики запросов (api.metrics, /api/internal/metrics/). Для доли
+# METRICS_SAMPLE_RATE запросов считаются SQL и время сериализаторов.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', 0.05))
+
+METRICS_SERVER_TIMING = os.getenv('METRICS_SERVER_TIMING', 'True') == 'True'
+
+# 'database' - индексы PostgreSQL (на других базах - массив в памяти),
+# 'memory' - отсортированный массив в памяти
+INGREDIENT_SEARCH_BACKEND = os.getenv('INGREDIENT_SEARCH_BACKEND', 'database')
+
+INGREDIENT_SEARCH_MAX_LIMIT = 100
+
+# Перестройка индексов поиска в памяти при смене версии таблиц:
+# 'thread' - в фоновом потоке, 'sync' - в запросе
+SEARCH_INDEX_REFRESH = os.getenv('SEARCH_INDEX_REFRESH', 'thread')
+
+# Конфигурация полнотекстового поиска рецептов на PostgreSQL,
+# должна совпадать с конфигурацией в триггерах миграции recipes 0014.
+RECIPE_SEARCH_CONFIG = 'russian'
+
+RECIPE_MATCH_DEFAULT_LIMIT = 10
+
+RECIPE_MATCH_MAX_LIMIT = 50
+
+RECIPE_MATCH_MAX_INGREDIENTS = 100
+
+# Предел числа рецептов в одном запросе пакетного избранного и корзины.
+RECIPE_BATCH_MAX_SIZE = 100
+
+# Рейтинги рецептов (recipes.rankings): вес добавления в корзину
+# относительно избранного, период полураспада и окно для trending.
+RANKING_CART_WEIGHT = 0.5
+
+RANKING_TRENDING_HALF_LIFE = timedelta(hours=48)
+
+RANKING_TRENDING_WINDOW = timedelta(days=14)
+
+# 'thread' - пул потоков в процессе приложения, 'sync' - без очереди
+RECIPE_IMAGE_PROCESSING = os.getenv('RECIPE_IMAGE_PROCESSING', 'thread')
+
+RECIPE_IMAGE_WORKERS = int(os.getenv('RECIPE_IMAGE_WORKERS', 2))
+
+RECIPE_IMAGE_VARIANTS = {
+    'small': (320, 320),
+    'medium': (640, 640),
+    'large': (1280, 1280),
+}
+
+RECIPE_IMAGE_QUALITY = 82
+
+# Ограничения загружаемого изображения рецепта: байты и пиксели.
+RECIPE_IMAGE_MAX_SIZE = int(os.getenv('RECIPE_IMAGE_MAX_SIZE', 10 * 2 ** 20))
+
+RECIPE_IMAGE_MAX_PIXELS = 40 * 10 ** 6
+
+# Исходное изображение хранится перекодированным и не больше этого размера.
+RECIPE_IMAGE_ORIGINAL_SIZE = (2560, 2560)
+
 SHOPPING_CART_FILENAME = 'shoppingcart.txt'
 
+SHOPPING_CART_CHUNK_SIZE = 64 * 1024
+
+SHOPPING_CART_PDF_FONT = os.getenv(
+    'SHOPPING_CART_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf')
+
+# Снимок пользователя для токена в кэше (api.authentication), секунд.
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 300))
+
+# Снимки кэшируются только в общем для процессов кэше: сброс при выходе,
+# смене пароля или деактивации должен дойти до всех воркеров.
+AUTH_TOKEN_CACHE_ENABLED = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# JWT (Bearer) в дополнение к токенам, /api/auth/jwt/create/ и refresh/.
+AUTH_JWT_ENABLED = os.getenv('AUTH_JWT_ENABLED', 'False') == 'True'
+
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(
+        minutes=int(os.getenv('AUTH_JWT_ACCESS_MINUTES', 5))
+    ),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    'AUTH_HEADER_TYPES': ('Bearer',),
+}
+
+# Сжатие ответов: brotli, если установлен пакет Brotli, иначе gzip.
+# Ответы короче COMPRESSION_MIN_SIZE байт не сжимаются.
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True') == 'True'
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+
+COMPRESSION_BROTLI_QUALITY = 5
+
+COMPRESSION_GZIP_LEVEL = 6
+
+# Кодирование JSON в API через orjson, если он установлен.
+API_ORJSON = os.getenv('API_ORJSON', 'True') == 'True'
+
+# Потоки, выполняющие запросы под ASGI (foodgram.asgi), на процесс.
+# У каждого потока своё соединение с базой.
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 20))
+
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
-    ],
+        'api.authentication.CachedTokenAuthentication'
+        if AUTH_TOKEN_CACHE_ENABLED
+        else 'rest_framework.authentication.TokenAuthentication',
+    ] + (
+        [
+            'api.authentication.CachedJWTAuthentication'
+            if AUTH_TOKEN_CACHE_ENABLED
+            else 'rest_framework_simplejwt.authentication.JWTAuthentication'
+        ]
+        if AUTH_JWT_ENABLED else []
+    ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
@@ -1,8 +1,12 @@
 from django.contrib import admin
+from django.db import transaction
+from django.utils import timezone
 
+from api.cache import bump_table_version
 from foodgram import settings
 
 from . import models
+from .shopping_list import rebuild_for_recipe
 
 
 @admin.register(models.Tag)
@@ -53,6 +57,42 @@ class IngredientsListAdmin(admin.ModelAdmin):
     )
     empty_value_display = settings.EMPTY_VALUE_DISPLAY
 
+    @staticmethod
+    def recipes_changed(recipe_ids):
+        # Рецепт не сохраняется: дата изменения (ETag), версия таблицы
+        # для индексов в памяти и списки покупок обновляются здесь.
+        models.Recipe.objects.filter(id__in=recipe_ids).update(
+            updated_at=timezone.now()
+        )
+        transaction.on_commit(lambda: bump_table_version(models.Recipe))
+        for recipe_id in recipe_ids:
+            rebuild_for_recipe(recipe_id)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        self.recipes_changed([obj.recipe_id])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self.recipes_changed([obj.recipe_id])
+
+    def delete_queryset(self, request, queryset):
+        recipe_ids = set(queryset.values_list('recipe_id', flat=True))
+        super().delete_queryset(request, queryset)
+        self.recipes_changed(recipe_ids)
+
+
+@admin.register(models.ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'user',
+        'ingredient',
+        'total_amount',
+    )
+    list_select_related = ('user', 'ingredient')
+    empty_value_display = settings.EMPTY_VALUE_DISPLAY
+
 
 @admin.register(models.ShoppingCart)
 class UserCartAdmin(admin.ModelAdmin):
@@ -80,7 +120,8 @@ class RecipeAdmin(admin.ModelAdmin):
         'id',
         'name',
         'author',
-        'get_user_favorite',
+        'favorites_count',
+        'in_carts_count',
     )
     fields = (
         ('name',),
@@ -105,9 +146,11 @@ class RecipeAdmin(admin.ModelAdmin):
         'tags',
     )
     inlines = (IngredientsListInline, )
+    list_select_related = ('author',)
     empty_value_display = settings.EMPTY_VALUE_DISPLAY
 
-    def get_user_favorite(self, obj):
-        return obj.user_favorite.count()
-
-    get_user_favorite.short_description = 'Добавлений в избранное'
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Инлайн ингредиентов сохраняется мимо recipes.shopping_list.
+        if change:
+            rebuild_for_recipe(form.instance.id)
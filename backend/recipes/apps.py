@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class RecipesConfig(AppConfig):
     name = 'recipes'
     default_auto_field = 'django.db.models.BigAutoField'
+
+    def ready(self):
+        import recipes.signals  # noqa: F401
@@ -0,0 +1,103 @@
+from django.db import connection, transaction
+from django.db.models import F
+
+from recipes import shopping_list
+from recipes.counters import COUNTERS
+from recipes.models import Recipe, ShoppingCart
+
+
+def update_dependents(model, user_id, recipe_ids, delta):
+    """Счётчики рецептов и список покупок, которые иначе ведут сигналы."""
+    if not recipe_ids:
+        return
+    _, _, field = COUNTERS[model]
+    queryset = Recipe.objects.filter(id__in=recipe_ids)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gt': 0})
+    queryset.update(**{field: F(field) + delta})
+    if model is ShoppingCart:
+        if delta > 0:
+            shopping_list.add_recipes(user_id, recipe_ids)
+        else:
+            shopping_list.remove_recipes(user_id, recipe_ids)
+
+
+def linked_rows(model, user_id, recipe_ids):
+    """{id рецепта: id строки} пользователя среди recipe_ids."""
+    return {
+        recipe_id: pk
+        for pk, recipe_id in model.objects.filter(
+            user_id=user_id, recipe_id__in=recipe_ids
+        ).order_by().values_list('pk', 'recipe_id')
+    }
+
+
+def delete_rows(model, pks):
+    """Один DELETE по первичным ключам, без сбора объектов и сигналов.
+
+    QuerySet.delete() при подключённых сигналах выбирает строки и шлёт
+    pre_delete/post_delete на каждую, отдельными запросами.
+    """
+    if not pks:
+        return
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} '
+            f'WHERE {quote(model._meta.pk.column)} IN '
+            f'({", ".join(["%s"] * len(pks))})',
+            list(pks),
+        )
+
+
+def lock_recipes(recipe_ids):
+    """Блокирует строки рецептов до конца транзакции.
+
+    Вставка в избранное или корзину проверяет внешний ключ на рецепт
+    (FOR KEY SHARE), поэтому конкурентное добавление тех же рецептов
+    ждёт этой транзакции, и строки, выбранные после блокировки,
+    не меняются до её конца. В SQLite запись и так сериализуется.
+    """
+    list(Recipe.objects.select_for_update().filter(
+        id__in=recipe_ids
+    ).order_by('id').values_list('id', flat=True))
+
+
+@transaction.atomic
+def add(model, user_id, recipe_ids):
+    """Добавляет рецепты в избранное или корзину одним INSERT.
+
+    Строки, которые успела вставить другая транзакция, пропускаются
+    (ignore_conflicts), а добавленными считаются рецепты, строк которых
+    не было до вставки: пока рецепты заблокированы, новые строки на них
+    может вставить только эта транзакция. Счётчики и список покупок
+    меняются только для них.
+    """
+    lock_recipes(recipe_ids)
+    linked = linked_rows(model, user_id, recipe_ids)
+    model.objects.bulk_create(
+        (model(user_id=user_id, recipe_id=pk)
+         for pk in recipe_ids if pk not in linked),
+        ignore_conflicts=True,
+    )
+    inserted = linked_rows(model, user_id, recipe_ids).keys() - linked.keys()
+    added = [pk for pk in recipe_ids if pk in inserted]
+    update_dependents(model, user_id, added, 1)
+    return {
+        'added': added,
+        'existing': [pk for pk in recipe_ids if pk not in inserted],
+    }
+
+
+@transaction.atomic
+def remove(model, user_id, recipe_ids):
+    """Удаляет рецепты из избранного или корзины одним DELETE."""
+    lock_recipes(recipe_ids)
+    linked = linked_rows(model, user_id, recipe_ids)
+    removed = [pk for pk in recipe_ids if pk in linked]
+    delete_rows(model, [linked[pk] for pk in removed])
+    update_dependents(model, user_id, removed, -1)
+    return {
+        'removed': removed,
+        'missing': [pk for pk in recipe_ids if pk not in linked],
+    }
@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Recipe, ShoppingCart, UserFavourite
+
+
+User = get_user_model()
+
+# Модель-источник: (модель со счётчиком, поле связи источника, счётчик).
+COUNTERS = {
+    UserFavourite: (Recipe, 'recipe', 'favorites_count'),
+    ShoppingCart: (Recipe, 'recipe', 'in_carts_count'),
+    Recipe: (User, 'author', 'recipes_count'),
+}
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                count=Count('pk')
+            ).values('count')
+        ),
+        0
+    )
+
+
+def recount():
+    """Пересчитывает счётчики, возвращает число исправленных строк."""
+    fixed = {}
+    for related_model, (model, related_field, field) in COUNTERS.items():
+        actual = count_subquery(related_model, related_field)
+        fixed[f'{model._meta.model_name}.{field}'] = model.objects.exclude(
+            **{field: actual}
+        ).update(**{field: actual})
+    return fixed
@@ -0,0 +1,161 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from foodgram.settings import (
+    RECIPE_IMAGE_ORIGINAL_SIZE,
+    RECIPE_IMAGE_PROCESSING,
+    RECIPE_IMAGE_QUALITY,
+    RECIPE_IMAGE_VARIANTS,
+    RECIPE_IMAGE_WORKERS,
+)
+from recipes.models import Recipe
+
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_PATH = 'static/recipe/variants/'
+SOURCE_KEY = 'source'
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=RECIPE_IMAGE_WORKERS,
+                    thread_name_prefix='recipe-images',
+                )
+    return _executor
+
+
+def needs_processing(recipe):
+    return bool(recipe.image) and (
+        recipe.image.name != recipe.image_variants.get(SOURCE_KEY)
+    )
+
+
+def normalize(image):
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        return image.convert('RGBA')
+    return image.convert('RGB')
+
+
+def encode(image, image_format):
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        image_format,
+        quality=RECIPE_IMAGE_QUALITY,
+        optimize=True,
+    )
+    return buffer.getvalue()
+
+
+def get_fallback_format(image):
+    """(формат, расширение), которые понимает любой браузер."""
+    return ('PNG', 'png') if image.mode == 'RGBA' else ('JPEG', 'jpg')
+
+
+def render_original(image):
+    """(расширение, байты) исходного изображения для хранения.
+
+    Оно перекодируется без метаданных и уменьшается
+    до RECIPE_IMAGE_ORIGINAL_SIZE.
+    """
+    image_format, extension = get_fallback_format(image)
+    original = image.copy()
+    original.thumbnail(RECIPE_IMAGE_ORIGINAL_SIZE, Image.LANCZOS)
+    return extension, encode(original, image_format)
+
+
+def render_variants(image):
+    """(имя варианта, расширение, байты) для всех размеров и форматов."""
+    fallback = get_fallback_format(image)
+    for name, size in RECIPE_IMAGE_VARIANTS.items():
+        variant = image.copy()
+        variant.thumbnail(size, Image.LANCZOS)
+        for image_format, extension in (('WEBP', 'webp'), fallback):
+            key = name if image_format != 'WEBP' else f'{name}_webp'
+            yield key, extension, encode(variant, image_format)
+
+
+def process_recipe_image(recipe_id):
+    """Перекодирует изображение рецепта и строит его уменьшенные копии.
+
+    Загруженный файл заменяется перекодированным (render_original)
+    и удаляется, если изображение рецепта за время обработки не сменилось.
+    """
+    recipe = Recipe.objects.filter(id=recipe_id).only(
+        'id', 'image', 'image_variants'
+    ).first()
+    if recipe is None or not needs_processing(recipe):
+        return
+    source = recipe.image.name
+    with recipe.image.open('rb') as file:
+        image = normalize(Image.open(file))
+    directory, name = os.path.split(source)
+    stem = os.path.splitext(name)[0]
+    extension, content = render_original(image)
+    original = default_storage.save(
+        f'{directory}/{stem}.{extension}', ContentFile(content)
+    )
+    variants = {SOURCE_KEY: original}
+    for key, extension, content in render_variants(image):
+        variants[key] = default_storage.save(
+            f'{VARIANTS_PATH}{recipe_id}/{stem}_{key}.{extension}',
+            ContentFile(content)
+        )
+    updated = Recipe.objects.filter(id=recipe_id, image=source).update(
+        image=original,
+        image_variants=variants,
+        updated_at=timezone.now(),
+    )
+    if updated:
+        stale = [
+            path for key, path in recipe.image_variants.items()
+            if key != SOURCE_KEY
+        ]
+        # Один файл может быть у нескольких рецептов (копии, заглушки).
+        if not Recipe.objects.filter(image=source).exists():
+            stale.append(source)
+    else:
+        stale = variants.values()
+    for path in stale:
+        default_storage.delete(path)
+
+
+def run_in_worker(recipe_id):
+    try:
+        process_recipe_image(recipe_id)
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', recipe_id)
+    finally:
+        connections.close_all()
+
+
+def schedule_recipe_image(recipe_id):
+    """Ставит обработку в очередь после фиксации транзакции.
+
+    RECIPE_IMAGE_PROCESSING: 'thread' - пул потоков процесса,
+    'sync' - сразу в текущем потоке (локальная разработка, тесты).
+    """
+    if RECIPE_IMAGE_PROCESSING == 'sync':
+        transaction.on_commit(lambda: process_recipe_image(recipe_id))
+    else:
+        transaction.on_commit(
+            lambda: get_executor().submit(run_in_worker, recipe_id)
+        )
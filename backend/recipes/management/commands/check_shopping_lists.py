@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from recipes.shopping_list import find_mismatches, rebuild
+
+
+class Command(BaseCommand):
+    help = ('Compare ShoppingListItem with totals aggregated from carts, '
+            'optionally rebuild lists that differ.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true')
+        parser.add_argument('--show', type=int, default=20)
+
+    def handle(self, *args, **options):
+        mismatches = find_mismatches()
+        for user_id, ingredient_id, expected, stored in mismatches[
+            :options['show']
+        ]:
+            self.stdout.write(
+                f'user {user_id}, ingredient {ingredient_id}: '
+                f'ожидается {expected}, в таблице {stored}'
+            )
+        users = sorted({user_id for user_id, *_ in mismatches})
+        self.stdout.write(
+            f'Расхождений: {len(mismatches)}, пользователей: {len(users)}'
+        )
+        if options['fix'] and users:
+            rebuild(users)
+            self.stdout.write(self.style.SUCCESS(
+                f'Списки покупок пересобраны: {len(users)}'
+            ))
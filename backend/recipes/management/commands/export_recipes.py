@@ -0,0 +1,78 @@
+import json
+import sys
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+
+from recipes.models import IngredientsList, Recipe
+
+
+class Command(BaseCommand):
+    help = 'Export recipes to NDJSON file (one recipe per line).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    @staticmethod
+    def iter_chunks(chunk_size):
+        queryset = Recipe.objects.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe',
+                queryset=IngredientsList.objects.select_related('ingredient')
+            ),
+        ).order_by('id')
+        last_id = 0
+        while True:
+            chunk = list(queryset.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1].id
+
+    @staticmethod
+    def to_dict(recipe):
+        return {
+            'name': recipe.name,
+            'author': recipe.author.email,
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+            'image': recipe.image.name,
+            'pub_date': recipe.pub_date.isoformat(),
+            'tags': [tag.slug for tag in recipe.tags.all()],
+            'ingredients': [
+                {
+                    'name': item.ingredient.name,
+                    'measurement_unit': item.ingredient.measurement_unit,
+                    'amount': item.amount,
+                }
+                for item in recipe.recipe.all()
+            ],
+        }
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file = (
+            sys.stdout if path == '-'
+            else open(path, 'w', encoding='UTF-8')
+        )
+        exported = 0
+        start = perf_counter()
+        try:
+            for chunk in self.iter_chunks(options['chunk_size']):
+                file.writelines(
+                    json.dumps(self.to_dict(recipe), ensure_ascii=False)
+                    + '\n'
+                    for recipe in chunk
+                )
+                exported += len(chunk)
+        finally:
+            if file is not sys.stdout:
+                file.close()
+        elapsed = perf_counter() - start
+        self.stderr.write(
+            f'Выгружено рецептов: {exported}, '
+            f'{exported / elapsed if elapsed else exported:.0f} рецептов/с.'
+        )
@@ -1,21 +1,169 @@
-from csv import reader
+import csv
+import io
+import json
+import os
+from itertools import islice
+from time import perf_counter
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
+from api.cache import bump_table_version
 from recipes.models import Ingredient
 
 
+DEFAULT_PATHS = {
+    'csv': './data/ingredients.csv',
+    'json': './data/ingredients.json',
+}
+READ_SIZE = 64 * 1024
+
+
+def iter_csv(file):
+    for row in csv.reader(file):
+        if len(row) == 2:
+            yield row
+
+
+def iter_json(file):
+    """Потоково разбирает JSON-массив объектов, не читая файл целиком."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    for chunk in iter(lambda: file.read(READ_SIZE), ''):
+        buffer += chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if not started and position < len(buffer):
+                if buffer[position] != '[':
+                    raise CommandError('Ожидается JSON-массив ингредиентов.')
+                started = True
+                position += 1
+                continue
+            if position >= len(buffer) or buffer[position] == ']':
+                break
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                break
+            yield item.get('name', ''), item.get('measurement_unit', '')
+        buffer = buffer[position:]
+    if buffer.strip() not in ('', ']'):
+        raise CommandError('Некорректный JSON в файле ингредиентов.')
+
+
+READERS = {
+    'csv': iter_csv,
+    'json': iter_json,
+}
+
+
+def iter_batches(rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
 class Command(BaseCommand):
-    help = 'Load ingredients from csv file.'
-
-    def handle(self, *args, **kwargs):
-        with open(
-                './data/ingredients.csv', 'r',
-                encoding='UTF-8'
-        ) as ingredients_csv:
-            for ingredien_row in reader(ingredients_csv):
-                if len(ingredien_row) == 2:
-                    Ingredient.objects.get_or_create(
-                        name=ingredien_row[0],
-                        measurement_unit=ingredien_row[1],
-                    )
+    help = 'Load ingredients from csv or json file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?')
+        parser.add_argument('--format', choices=READERS, dest='file_format')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    @staticmethod
+    def clean(rows):
+        for name, measurement_unit in rows:
+            name = name.strip()
+            measurement_unit = measurement_unit.strip()
+            if name and measurement_unit:
+                yield name, measurement_unit
+
+    @staticmethod
+    def insert_batch(batch):
+        Ingredient.objects.bulk_create(
+            (
+                Ingredient(name=name, measurement_unit=measurement_unit)
+                for name, measurement_unit in batch
+            ),
+            batch_size=len(batch),
+            ignore_conflicts=True,
+        )
+
+    @staticmethod
+    def copy_batches(batches):
+        table = Ingredient._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE ingredients_import '
+                '(name text, measurement_unit text) ON COMMIT DROP'
+            )
+            for batch in batches:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    'COPY ingredients_import (name, measurement_unit) '
+                    'FROM STDIN WITH CSV',
+                    buffer
+                )
+                yield batch
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT DISTINCT name, measurement_unit '
+                'FROM ingredients_import '
+                'ON CONFLICT ON CONSTRAINT unique_for_ingredient DO NOTHING'
+            )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['file_format']
+        if file_format is None:
+            file_format = (
+                os.path.splitext(path)[1].lstrip('.').lower()
+                if path else 'csv'
+            )
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {file_format}')
+        path = path or DEFAULT_PATHS[file_format]
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше 0.')
+
+        use_copy = (
+            connection.vendor == 'postgresql'
+            and not options['dry_run']
+        )
+        before = 0 if options['dry_run'] else Ingredient.objects.count()
+        rows_count = 0
+        start = perf_counter()
+        with open(path, 'r', encoding='UTF-8') as file, transaction.atomic():
+            batches = iter_batches(
+                self.clean(READERS[file_format](file)),
+                options['batch_size']
+            )
+            if use_copy:
+                batches = self.copy_batches(batches)
+            for batch in batches:
+                if not options['dry_run'] and not use_copy:
+                    self.insert_batch(batch)
+                rows_count += len(batch)
+        elapsed = perf_counter() - start
+        if not options['dry_run']:
+            bump_table_version(Ingredient)
+
+        created = (
+            0 if options['dry_run'] else Ingredient.objects.count() - before
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Прочитано строк: {rows_count}, добавлено: {created}'
+            f'{" (dry-run)" if options["dry_run"] else ""}, '
+            f'{rows_count / elapsed if elapsed else rows_count:.0f} строк/с'
+            f'{" (COPY)" if use_copy else ""}.'
+        ))
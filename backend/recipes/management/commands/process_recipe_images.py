@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import needs_processing, process_recipe_image
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Build thumbnails and WebP variants for recipe images.'
+
+    def handle(self, *args, **kwargs):
+        processed = 0
+        failed = 0
+        for recipe in Recipe.objects.only(
+            'id', 'image', 'image_variants'
+        ).iterator():
+            if not needs_processing(recipe):
+                continue
+            try:
+                process_recipe_image(recipe.id)
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f'{recipe.image.name}: {error}')
+                continue
+            processed += 1
+        self.stdout.write(
+            f'Обработано изображений: {processed}, с ошибками: {failed}'
+        )
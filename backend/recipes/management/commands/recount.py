@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from recipes.counters import recount
+
+
+class Command(BaseCommand):
+    help = 'Recalculate favourite, cart and recipe counters.'
+
+    def handle(self, *args, **kwargs):
+        for counter, fixed in recount().items():
+            self.stdout.write(f'{counter}: исправлено строк {fixed}')
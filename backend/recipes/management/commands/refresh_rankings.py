@@ -0,0 +1,22 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand
+
+from recipes.rankings import refresh
+
+
+class Command(BaseCommand):
+    help = ('Refresh popular and trending recipe scores. Run it from cron '
+            'or with --interval as a long-running scheduler.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, help='Repeat every '
+                            'INTERVAL seconds instead of running once.')
+
+    def handle(self, *args, **options):
+        while True:
+            for name, count in refresh().items():
+                self.stdout.write(f'{name}: строк {count}')
+            if not options['interval']:
+                return
+            sleep(options['interval'])
@@ -0,0 +1,146 @@
+# Generated by Django 3.2.14 on 2026-10-18 04:10
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Вектор: название (A), описание (B) и названия ингредиентов (C).
+# Ингредиенты меняются bulk-операциями без сигналов, поэтому вектор
+# поддерживают триггеры: строка рецепта пересчитывается BEFORE-триггером,
+# остальные таблицы сбрасывают search_vector в NULL, что его запускает.
+CREATE_SQL = """
+CREATE FUNCTION recipes_recipe_search_vector(bigint, text, text)
+RETURNS tsvector LANGUAGE sql STABLE AS $$
+    SELECT setweight(to_tsvector('russian', coalesce($2, '')), 'A')
+        || setweight(to_tsvector('russian', coalesce($3, '')), 'B')
+        || setweight(to_tsvector('russian', coalesce((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM recipes_ingredientslist AS item
+            JOIN recipes_ingredient AS ingredient
+                ON ingredient.id = item.ingredient_id
+            WHERE item.recipe_id = $1
+        ), '')), 'C')
+$$;
+
+CREATE FUNCTION recipes_recipe_search_vector_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := recipes_recipe_search_vector(
+        NEW.id, NEW.name, NEW.text
+    );
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER recipes_recipe_search_vector
+BEFORE INSERT OR UPDATE OF name, text, search_vector ON recipes_recipe
+FOR EACH ROW EXECUTE PROCEDURE recipes_recipe_search_vector_trigger();
+
+CREATE FUNCTION recipes_ingredientslist_search_vector_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE recipes_recipe SET search_vector = NULL
+        WHERE id IN (SELECT recipe_id FROM new_rows);
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE recipes_recipe SET search_vector = NULL
+        WHERE id IN (SELECT recipe_id FROM old_rows);
+    ELSE
+        UPDATE recipes_recipe SET search_vector = NULL
+        WHERE id IN (
+            SELECT unnest(ARRAY[old_row.recipe_id, new_row.recipe_id])
+            FROM old_rows AS old_row
+            JOIN new_rows AS new_row ON new_row.id = old_row.id
+            WHERE old_row.ingredient_id <> new_row.ingredient_id
+                OR old_row.recipe_id <> new_row.recipe_id
+        );
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER recipes_ingredientslist_search_vector_insert
+AFTER INSERT ON recipes_ingredientslist
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE PROCEDURE recipes_ingredientslist_search_vector_trigger();
+
+CREATE TRIGGER recipes_ingredientslist_search_vector_delete
+AFTER DELETE ON recipes_ingredientslist
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE PROCEDURE recipes_ingredientslist_search_vector_trigger();
+
+CREATE TRIGGER recipes_ingredientslist_search_vector_update
+AFTER UPDATE ON recipes_ingredientslist
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE PROCEDURE recipes_ingredientslist_search_vector_trigger();
+
+CREATE FUNCTION recipes_ingredient_search_vector_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE recipes_recipe SET search_vector = NULL
+    WHERE id IN (
+        SELECT recipe_id FROM recipes_ingredientslist
+        WHERE ingredient_id = NEW.id
+    );
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER recipes_ingredient_search_vector
+AFTER UPDATE OF name ON recipes_ingredient
+FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+EXECUTE PROCEDURE recipes_ingredient_search_vector_trigger();
+
+UPDATE recipes_recipe SET search_vector = NULL;
+
+CREATE INDEX recipes_recipe_search_vector_gin
+ON recipes_recipe USING gin (search_vector);
+"""
+
+DROP_SQL = """
+DROP INDEX IF EXISTS recipes_recipe_search_vector_gin;
+DROP TRIGGER IF EXISTS recipes_ingredient_search_vector
+    ON recipes_ingredient;
+DROP TRIGGER IF EXISTS recipes_ingredientslist_search_vector_insert
+    ON recipes_ingredientslist;
+DROP TRIGGER IF EXISTS recipes_ingredientslist_search_vector_delete
+    ON recipes_ingredientslist;
+DROP TRIGGER IF EXISTS recipes_ingredientslist_search_vector_update
+    ON recipes_ingredientslist;
+DROP TRIGGER IF EXISTS recipes_recipe_search_vector ON recipes_recipe;
+DROP FUNCTION IF EXISTS recipes_ingredient_search_vector_trigger();
+DROP FUNCTION IF EXISTS recipes_ingredientslist_search_vector_trigger();
+DROP FUNCTION IF EXISTS recipes_recipe_search_vector_trigger();
+DROP FUNCTION IF EXISTS recipes_recipe_search_vector(bigint, text, text);
+"""
+
+
+def create_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CREATE_SQL)
+
+
+def drop_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.db.models.functions import Length
@@ -110,6 +111,12 @@ class Recipe(models.Model):
         verbose_name='Изображение',
         upload_to='static/recipe/',
     )
+    image_variants = models.JSONField(
+        verbose_name='Варианты изображения',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField(
         verbose_name='Описание',
         max_length=settings.MAX_LEN_TEXTFIELD,
@@ -126,11 +133,38 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    # ETag ответа рецепта, см. RecipesViewSet.retrieve.
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в избранное',
+        default=0,
+        editable=False,
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в корзину',
+        default=0,
+        editable=False,
+    )
+    # Заполняется триггером PostgreSQL (миграция 0014), на SQLite - NULL.
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx',
+            ),
+        )
         constraints = (
             models.UniqueConstraint(
                 fields=(
@@ -199,6 +233,11 @@ class UserFavourite(models.Model):
         related_name='user_favorite',
         on_delete=models.CASCADE,
     )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True,
+        db_index=True,
+    )
 
     class Meta:
         verbose_name = 'Избранное'
@@ -227,6 +266,11 @@ class ShoppingCart(models.Model):
         related_name='shopping_cart',
         on_delete=models.CASCADE,
     )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True,
+        db_index=True,
+    )
 
     class Meta:
         verbose_name = 'Корзина покупок'
@@ -241,3 +285,79 @@ class ShoppingCart(models.Model):
     def __str__(self):
         return (f'рецепт "{self.recipe}" добавлен ',
                 f'в корзину пользователем {self.user}')
+
+
+class ShoppingListItem(models.Model):
+    """Итог по ингредиенту для всех рецептов корзины пользователя.
+
+    Поддерживается приращениями из recipes.shopping_list.
+    """
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        related_name='shopping_list',
+        on_delete=models.CASCADE,
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        verbose_name='Ингредиент',
+        related_name='shopping_list',
+        on_delete=models.CASCADE,
+    )
+    total_amount = models.PositiveIntegerField(
+        verbose_name='Количество',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Списки покупок'
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_shopping_list_item',
+                fields=['user', 'ingredient'],
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user}: {self.ingredient} {self.total_amount}'
+
+
+class RecipeRanking(models.Model):
+    """Оценки рецепта для сортировок popular и trending.
+
+    Пересчитываются пакетно в recipes.rankings, при чтении соединяются
+    с рецептом по первичному ключу.
+    """
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name='Рецепт',
+        related_name='ranking',
+        primary_key=True,
+        on_delete=models.CASCADE,
+    )
+    popular_score = models.FloatField(
+        verbose_name='Популярность',
+        default=0,
+    )
+    trending_score = models.FloatField(
+        verbose_name='Популярность за последнее время',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        indexes = (
+            models.Index(
+                fields=('-popular_score', '-recipe'),
+                name='ranking_popular_idx',
+            ),
+            models.Index(
+                fields=('-trending_score', '-recipe'),
+                name='ranking_trending_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.popular_score} {self.trending_score}'
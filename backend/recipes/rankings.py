@@ -0,0 +1,107 @@
+from collections import defaultdict
+from math import exp, log
+
+from django.db import transaction
+from django.db.models import (
+    ExpressionWrapper,
+    F,
+    FloatField,
+    OuterRef,
+    Subquery,
+)
+from django.utils import timezone
+
+from foodgram.settings import (
+    RANKING_CART_WEIGHT,
+    RANKING_TRENDING_HALF_LIFE,
+    RANKING_TRENDING_WINDOW,
+)
+from recipes.models import Recipe, RecipeRanking, ShoppingCart, UserFavourite
+
+
+BATCH_SIZE = 1000
+
+EVENTS = (
+    (UserFavourite, 1),
+    (ShoppingCart, RANKING_CART_WEIGHT),
+)
+
+
+def create_missing():
+    """Строки рейтинга для рецептов, созданных без сигналов (импорт)."""
+    recipe_ids = list(Recipe.objects.filter(
+        ranking__isnull=True
+    ).values_list('id', flat=True))
+    RecipeRanking.objects.bulk_create(
+        (RecipeRanking(recipe_id=recipe_id) for recipe_id in recipe_ids),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return len(recipe_ids)
+
+
+def refresh_popular():
+    """Популярность за всё время по счётчикам рецепта.
+
+    Перезаписываются только изменившиеся строки.
+    """
+    actual = Subquery(
+        Recipe.objects.filter(pk=OuterRef('recipe_id')).values(
+            score=ExpressionWrapper(
+                F('favorites_count')
+                + F('in_carts_count') * RANKING_CART_WEIGHT,
+                output_field=FloatField(),
+            )
+        )
+    )
+    return RecipeRanking.objects.exclude(
+        popular_score=actual
+    ).update(popular_score=actual)
+
+
+def trending_scores(now):
+    """Сумма весов добавлений за окно с экспоненциальным затуханием."""
+    decay = log(2) / RANKING_TRENDING_HALF_LIFE.total_seconds()
+    scores = defaultdict(float)
+    for model, weight in EVENTS:
+        for recipe_id, created in model.objects.filter(
+            created__gte=now - RANKING_TRENDING_WINDOW
+        ).values_list('recipe_id', 'created').iterator(chunk_size=10000):
+            scores[recipe_id] += weight * exp(
+                -decay * (now - created).total_seconds()
+            )
+    return scores
+
+
+def refresh_trending(now=None):
+    """Пересчитывает trending только для рецептов с событиями в окне.
+
+    Рецептам, чьи события вышли из окна, оценка обнуляется. Объём работы
+    зависит от активности за окно, а не от числа рецептов.
+    """
+    scores = trending_scores(now or timezone.now())
+    recipe_ids = set(scores).union(RecipeRanking.objects.filter(
+        trending_score__gt=0
+    ).values_list('recipe_id', flat=True))
+    RecipeRanking.objects.bulk_update(
+        (
+            RecipeRanking(
+                recipe_id=recipe_id,
+                trending_score=scores.get(recipe_id, 0),
+            )
+            for recipe_id in recipe_ids
+        ),
+        ('trending_score',),
+        batch_size=BATCH_SIZE,
+    )
+    return len(recipe_ids)
+
+
+@transaction.atomic
+def refresh(now=None):
+    """Обновляет рейтинги, возвращает число затронутых строк."""
+    return {
+        'created': create_missing(),
+        'popular': refresh_popular(),
+        'trending': refresh_trending(now),
+    }
@@ -0,0 +1,145 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Greatest
+
+from recipes.models import IngredientsList, ShoppingCart, ShoppingListItem
+
+
+def recipe_amounts(recipe_id):
+    return dict(IngredientsList.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('ingredient_id', 'amount'))
+
+
+def apply_deltas(user_ids, deltas):
+    """Прибавляет {id ингредиента: приращение} к спискам пользователей."""
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items() if delta
+    }
+    if not user_ids or not deltas:
+        return
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id)
+            for user_id in user_ids
+            for ingredient_id, delta in deltas.items() if delta > 0
+        ),
+        ignore_conflicts=True,
+    )
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids,
+        ingredient_id__in=deltas,
+    )
+    items.update(total_amount=Greatest(
+        F('total_amount') + Case(
+            *(When(ingredient_id=ingredient_id, then=Value(delta))
+              for ingredient_id, delta in deltas.items()),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    ))
+    if any(delta < 0 for delta in deltas.values()):
+        items.filter(total_amount=0).delete()
+
+
+def add_recipe(user_id, recipe_id):
+    apply_deltas([user_id], recipe_amounts(recipe_id))
+
+
+def remove_recipe(user_id, recipe_id):
+    apply_deltas([user_id], {
+        ingredient_id: -amount
+        for ingredient_id, amount in recipe_amounts(recipe_id).items()
+    })
+
+
+def total_amounts(recipe_ids):
+    """Суммы ингредиентов нескольких рецептов одним запросом."""
+    return dict(IngredientsList.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by().values('ingredient_id').annotate(
+        total=Sum('amount')
+    ).values_list('ingredient_id', 'total'))
+
+
+def add_recipes(user_id, recipe_ids):
+    apply_deltas([user_id], total_amounts(recipe_ids))
+
+
+def remove_recipes(user_id, recipe_ids):
+    apply_deltas([user_id], {
+        ingredient_id: -amount
+        for ingredient_id, amount in total_amounts(recipe_ids).items()
+    })
+
+
+def change_recipe(recipe_id, deltas):
+    """Переносит изменение ингредиентов рецепта во все корзины с ним."""
+    if any(deltas.values()):
+        apply_deltas(
+            list(ShoppingCart.objects.filter(
+                recipe_id=recipe_id
+            ).values_list('user_id', flat=True)),
+            deltas
+        )
+
+
+def aggregate(user_ids=None):
+    """Итоги, посчитанные по корзинам заново: (user, ingredient, сумма)."""
+    # Одно условие на корзину: второй filter() по многозначной связи
+    # добавил бы ещё одно соединение и размножил суммы.
+    if user_ids is None:
+        queryset = IngredientsList.objects.filter(
+            recipe__shopping_cart__isnull=False
+        )
+    else:
+        queryset = IngredientsList.objects.filter(
+            recipe__shopping_cart__user__in=user_ids
+        )
+    return queryset.order_by().values_list(
+        'recipe__shopping_cart__user', 'ingredient'
+    ).annotate(total=Sum('amount'))
+
+
+def find_mismatches():
+    """(user, ingredient, ожидается, в таблице) для расходящихся строк."""
+    expected = {
+        (user_id, ingredient_id): total
+        for user_id, ingredient_id, total in aggregate().iterator()
+    }
+    items = ShoppingListItem.objects.values_list(
+        'user_id', 'ingredient_id', 'total_amount'
+    )
+    stored = {
+        (user_id, ingredient_id): total
+        for user_id, ingredient_id, total in items.iterator()
+    }
+    return sorted(
+        (*key, expected.get(key, 0), stored.get(key, 0))
+        for key in expected.keys() | stored.keys()
+        if expected.get(key, 0) != stored.get(key, 0)
+    )
+
+
+@transaction.atomic
+def rebuild(user_ids):
+    """Пересобирает списки покупок пользователей из их корзин."""
+    ShoppingListItem.objects.filter(user_id__in=user_ids).delete()
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(
+                user_id=user_id,
+                ingredient_id=ingredient_id,
+                total_amount=total,
+            )
+            for user_id, ingredient_id, total in aggregate(user_ids)
+        ),
+        batch_size=1000,
+    )
+
+
+def rebuild_for_recipe(recipe_id):
+    rebuild(list(ShoppingCart.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('user_id', flat=True)))
@@ -0,0 +1,61 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from recipes.counters import COUNTERS
+from recipes.images import needs_processing, schedule_recipe_image
+from recipes.models import (
+    Recipe,
+    RecipeRanking,
+    ShoppingCart,
+    UserFavourite,
+)
+from recipes.shopping_list import add_recipe, remove_recipe
+
+
+def change_counter(sender, instance, delta):
+    model, relation, field = COUNTERS[sender]
+    queryset = model.objects.filter(pk=getattr(instance, f'{relation}_id'))
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gt': 0})
+    queryset.update(**{field: F(field) + delta})
+
+
+@receiver(post_save, sender=UserFavourite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Recipe)
+def increment_counter(sender, instance, created, **kwargs):
+    if created:
+        change_counter(sender, instance, 1)
+
+
+@receiver(post_delete, sender=UserFavourite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Recipe)
+def decrement_counter(sender, instance, **kwargs):
+    change_counter(sender, instance, -1)
+
+
+@receiver(post_save, sender=Recipe)
+def process_image(sender, instance, **kwargs):
+    if needs_processing(instance):
+        schedule_recipe_image(instance.id)
+
+
+@receiver(post_save, sender=Recipe)
+def create_ranking(sender, instance, created, **kwargs):
+    # Нулевой рейтинг, чтобы рецепт сразу попадал в сортировки по нему.
+    if created:
+        RecipeRanking.objects.create(recipe=instance)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    if created:
+        add_recipe(instance.user_id, instance.recipe_id)
+
+
+# pre_delete: при каскадном удалении рецепта его ингредиенты ещё на месте.
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    remove_recipe(instance.user_id, instance.recipe_id)
@@ -23,6 +23,11 @@ class User(AbstractUser):
         verbose_name='Фамилия',
         max_length=settings.MAX_LEN_USERS_CHARFIELD,
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Количество рецептов',
+        default=0,
+        editable=False,
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']